@@ -0,0 +1,75 @@
+"""
+Shared I/O helpers for the RAG modules and scripts: JSON parsing, the pooled
+session for the local API server, and atomic dataset file swaps
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+    requests = None
+
+try:
+    import reflink
+    REFLINK_AVAILABLE = True
+except ImportError:
+    REFLINK_AVAILABLE = False
+    reflink = None
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON bytes or text, using orjson when available"""
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+def load_json(path: Union[str, Path]) -> Any:
+    """Parse a JSON file, using orjson when available"""
+    return json_loads(Path(path).read_bytes())
+
+def local_api_session() -> "requests.Session":
+    """Pooled keep-alive session for the local API server"""
+    session = requests.Session()
+    session.headers["Connection"] = "keep-alive"
+    # POSTs (e.g. /setup) are not idempotent, so urllib3 only retries them on connection errors
+    session.mount("http://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503], raise_on_status=False)
+    ))
+    return session
+
+def clone_file(src, dst):
+    """Clone src to dst without copying data where the filesystem allows it"""
+    if REFLINK_AVAILABLE:
+        try:
+            reflink.reflink(src, dst)
+            return
+        except Exception:
+            pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Cross-filesystem or no hard-link support
+        shutil.copy2(src, dst)
+
+def swap_in(src, dst):
+    """Atomically replace dst with a clone of src"""
+    tmp_path = dst + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    clone_file(src, tmp_path)
+    os.replace(tmp_path, dst)
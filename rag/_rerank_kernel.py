@@ -0,0 +1,60 @@
+"""
+Numeric core of scheme re-ranking
+Combines similarity with the scheme-name overlap boost and selects the top-K
+"""
+
+import numpy as np
+from typing import Tuple
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+# Score added per query term found in the scheme name
+NAME_OVERLAP_BOOST = 0.1
+
+def _rerank_topk_numpy(similarity: np.ndarray, overlap: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    scores = similarity + NAME_OVERLAP_BOOST * overlap
+    order = np.argsort(-scores, kind='stable')[:k]
+    return order, scores[order]
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _rerank_topk_numba(similarity, overlap, k):
+        n = similarity.shape[0]
+        k = max(0, min(k, n))
+        top_idx = np.empty(k, dtype=np.int64)
+        top_scores = np.empty(k, dtype=np.float64)
+        size = 0
+        if k == 0:
+            return top_idx, top_scores
+
+        # Single pass keeping a sorted buffer of the best k; a candidate only
+        # displaces strictly lower scores, so ties keep their input order
+        for i in range(n):
+            score = similarity[i] + NAME_OVERLAP_BOOST * overlap[i]
+            if size == k and score <= top_scores[k - 1]:
+                continue
+
+            pos = size if size < k else k - 1
+            while pos > 0 and top_scores[pos - 1] < score:
+                top_scores[pos] = top_scores[pos - 1]
+                top_idx[pos] = top_idx[pos - 1]
+                pos -= 1
+            top_scores[pos] = score
+            top_idx[pos] = i
+            if size < k:
+                size += 1
+
+        return top_idx[:size], top_scores[:size]
+
+def rerank_topk(similarity: np.ndarray, overlap: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (indices, relevance scores) of the top-k candidates, best first"""
+    similarity = np.ascontiguousarray(similarity, dtype=np.float64)
+    overlap = np.ascontiguousarray(overlap, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        return _rerank_topk_numba(similarity, overlap, k)
+    return _rerank_topk_numpy(similarity, overlap, k)
@@ -5,6 +5,7 @@ Provides REST API endpoints for scheme retrieval and recommendations
 
 from fastapi import FastAPI, HTTPException, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import os
@@ -112,7 +113,8 @@ async def startup_event():
         
         rag_engine = GovernmentSchemeRAG(
             vector_store_path=vector_store_path,
-            openai_api_key=openai_api_key
+            openai_api_key=openai_api_key,
+            warmup_queries_path="sample_queries.txt"
         )
         
         logger.info("RAG engine initialized successfully")
@@ -120,6 +122,15 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize RAG engine: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist the semantic query cache on shutdown"""
+    if rag_engine is not None:
+        try:
+            rag_engine.save_semantic_cache()
+        except Exception as e:
+            logger.error(f"Failed to save semantic cache: {e}")
+
 def ensure_rag_engine():
     """Ensure RAG engine is available"""
     if rag_engine is None:
@@ -159,7 +170,7 @@ async def query_schemes(request: QueryRequest) -> QueryResponse:
             filters['implementing_ministry'] = request.ministry_filter
         
         # Query RAG engine
-        result = rag_engine.query(
+        result = await rag_engine.aquery(
             user_query=request.query,
             max_schemes=request.max_results,
             additional_filters=filters if filters else None
@@ -193,6 +204,39 @@ async def query_schemes(request: QueryRequest) -> QueryResponse:
         logger.error(f"Query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@app.post("/query/stream")
+async def query_schemes_stream(request: QueryRequest) -> StreamingResponse:
+    """
+    Query government schemes and stream the AI-generated response as it is produced
+    """
+    ensure_rag_engine()
+    
+    # Prepare filters
+    filters = {}
+    if request.state_filter:
+        filters['state_name'] = request.state_filter
+    if request.category_filter:
+        filters['category'] = request.category_filter
+    if request.ministry_filter:
+        filters['implementing_ministry'] = request.ministry_filter
+    
+    stream = await rag_engine.aquery(
+        user_query=request.query,
+        max_schemes=request.max_results,
+        additional_filters=filters if filters else None,
+        stream=True
+    )
+    
+    async def response_text():
+        try:
+            async for delta, _ in stream:
+                if delta:
+                    yield delta
+        except Exception as e:
+            logger.error(f"Streaming query failed: {e}")
+    
+    return StreamingResponse(response_text(), media_type="text/plain; charset=utf-8")
+
 @app.post("/recommend", response_model=QueryResponse)
 async def recommend_schemes(request: RecommendationRequest) -> QueryResponse:
     """
@@ -230,7 +274,7 @@ async def recommend_schemes(request: RecommendationRequest) -> QueryResponse:
             filters['state_name'] = request.user_profile.state
         
         # Query RAG engine
-        result = rag_engine.query(
+        result = await rag_engine.aquery(
             user_query=query,
             max_schemes=request.max_results,
             additional_filters=filters if filters else None
@@ -290,7 +334,7 @@ async def get_schemes_by_state(state: str, limit: int = Query(20, ge=1, le=100))
     try:
         # Use dummy query for state-based search
         dummy_query = f"government schemes in {state}"
-        result = rag_engine.query(
+        result = await rag_engine.aquery(
             user_query=dummy_query,
             max_schemes=limit,
             additional_filters={'state_name': state}
@@ -5,6 +5,7 @@ This avoids LangChain's Gemini wrapper rate limiting issues
 
 from fastapi import FastAPI, HTTPException, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import os
@@ -130,7 +131,7 @@ async def setup_rag_system():
         documents = rag_system.create_documents_from_schemes(schemes)
         
         # Setup vector store with rate limiting
-        if not rag_system.setup_vector_store(documents):
+        if not await rag_system.asetup_vector_store(documents, full_rebuild=True):
             raise HTTPException(
                 status_code=500,
                 detail="Failed to setup vector store"
@@ -181,6 +182,37 @@ async def query_schemes(request: QueryRequest) -> QueryResponse:
         logger.error(f"Query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@app.post("/query/stream")
+async def query_schemes_stream(request: QueryRequest) -> StreamingResponse:
+    """
+    Query government schemes and stream the answer as it is generated
+    """
+    ensure_rag_system()
+    
+    if not rag_system.vector_store:
+        raise HTTPException(
+            status_code=400,
+            detail="RAG system not ready. Please run /setup first."
+        )
+    
+    try:
+        result = rag_system.query(
+            question=request.query,
+            include_sources=request.include_sources,
+            stream=True
+        )
+        
+        if not result.get("success", False):
+            raise HTTPException(status_code=500, detail=result.get("error", "Query failed"))
+        
+        return StreamingResponse(result["answer"], media_type="text/plain; charset=utf-8")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Streaming query failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
+
 @app.get("/stats", response_model=SystemStats)
 async def get_system_stats():
     """Get system statistics and health information"""
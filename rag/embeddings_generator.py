@@ -12,11 +12,13 @@ from openai import OpenAI
 import time
 import os
 from dotenv import load_dotenv
-from vector_store import SchemeDocument, SchemeVectorStore
+from vector_store import SchemeDocument, SchemeVectorStore, default_index_factory
 import tiktoken
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 from rich.console import Console
 
+from _io_helpers import load_json
+
 # Load environment variables
 load_dotenv()
 
@@ -184,8 +186,7 @@ class EmbeddingsGenerator:
         console.print(f"[bold blue]Loading dataset from: {dataset_path}[/bold blue]")
         
         # Load the dataset
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json(dataset_path)
         
         schemes = data.get('schemes', [])
         console.print(f"[green]Loaded {len(schemes)} schemes[/green]")
@@ -226,7 +227,8 @@ class EmbeddingsGenerator:
         # Create vector store
         vector_store = SchemeVectorStore(
             embedding_dim=self.embedding_dim,
-            index_path=str(output_dir / "index")
+            index_path=str(output_dir / "index"),
+            index_factory=default_index_factory(len(valid_documents), self.embedding_dim)
         )
         
         # Add documents to vector store
@@ -31,6 +31,9 @@ class QueryRequest(BaseModel):
     query: str = Field(..., description="Natural language query about government schemes")
     include_sources: bool = Field(True, description="Include source documents in response")
 
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., description="Queries to answer in a single request")
+
 class FilteredSearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
     state: Optional[str] = Field(None, description="Filter by state")
@@ -44,6 +47,9 @@ class QueryResponse(BaseModel):
     success: bool
     error: Optional[str] = None
 
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+
 class FilteredSearchResponse(BaseModel):
     question: str
     filters: Dict[str, str]
@@ -190,6 +196,16 @@ async def setup_rag_system():
         logger.error(f"Setup failed: {e}")
         raise HTTPException(status_code=500, detail=f"Setup failed: {str(e)}")
 
+def _query_response(result: Dict[str, Any]) -> QueryResponse:
+    """Convert a SchemeRAGSystem.query() result to the API response model"""
+    return QueryResponse(
+        answer=result["answer"],
+        sources=result.get("sources", []),
+        total_sources=result.get("total_sources", 0),
+        success=result.get("success", True),
+        error=result.get("error")
+    )
+
 @app.post("/query", response_model=QueryResponse)
 async def query_schemes(request: QueryRequest) -> QueryResponse:
     """
@@ -209,18 +225,40 @@ async def query_schemes(request: QueryRequest) -> QueryResponse:
             include_sources=request.include_sources
         )
         
-        return QueryResponse(
-            answer=result["answer"],
-            sources=result.get("sources", []),
-            total_sources=result.get("total_sources", 0),
-            success=result.get("success", True),
-            error=result.get("error")
-        )
+        return _query_response(result)
         
     except Exception as e:
         logger.error(f"Query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_schemes_batch(request: BatchQueryRequest) -> BatchQueryResponse:
+    """
+    Answer several queries in one request, sharing a single connection and body parse
+    """
+    ensure_rag_system()
+    
+    if not rag_system.qa_chain:
+        raise HTTPException(
+            status_code=400,
+            detail="RAG system not ready. Please run /setup first."
+        )
+    
+    results = []
+    for query_request in request.queries:
+        try:
+            result = rag_system.query(
+                question=query_request.query,
+                include_sources=query_request.include_sources
+            )
+            results.append(_query_response(result))
+        except Exception as e:
+            # One failing query should not fail the whole batch
+            logger.error(f"Batch query failed: {e}")
+            results.append(QueryResponse(answer="", sources=[], total_sources=0, success=False, error=str(e)))
+    
+    return BatchQueryResponse(results=results)
+
 @app.post("/search", response_model=FilteredSearchResponse)
 async def filtered_search(request: FilteredSearchRequest) -> FilteredSearchResponse:
     """
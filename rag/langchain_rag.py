@@ -4,7 +4,6 @@ Uses LangChain's robust RAG pipeline with ChromaDB vector store and Google Gemin
 """
 
 import os
-import json
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
@@ -23,6 +22,8 @@ from langchain.callbacks.base import BaseCallbackHandler
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 
+from _io_helpers import load_json
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,11 +38,25 @@ class SchemeRAGSystem:
                  embedding_model: str = "models/embedding-001",
                  llm_model: str = "gemini-1.5-pro"):
         
-        self.google_api_key = google_api_key or os.getenv("GOOGLE_API_KEY")
+        self.embedding_model = embedding_model
+        self.llm_model = llm_model
         self.chroma_persist_dir = Path(chroma_persist_dir)
         self.chroma_persist_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize LangChain components with Gemini
+        self.enable_gemini(google_api_key)
+        
+        # Initialize vector store
+        self.vector_store = None
+        self.qa_chain = None
+        
+        logger.info(f"Initialized SchemeRAGSystem with LangChain and Gemini 1.5 Pro")
+        
+    def enable_gemini(self, google_api_key: Optional[str] = None) -> bool:
+        """(Re)initialize the Gemini embeddings and LLM, falling back to GOOGLE_API_KEY"""
+        
+        self.google_api_key = google_api_key or os.getenv("GOOGLE_API_KEY")
+        
         if self.google_api_key:
             try:
                 # Set the API key in environment for LangChain
@@ -49,11 +64,11 @@ class SchemeRAGSystem:
                 
                 self.embeddings = GoogleGenerativeAIEmbeddings(
                     google_api_key=self.google_api_key,
-                    model=embedding_model
+                    model=self.embedding_model
                 )
                 self.llm = ChatGoogleGenerativeAI(
                     google_api_key=self.google_api_key,
-                    model=llm_model,
+                    model=self.llm_model,
                     temperature=0.7,
                     max_tokens=1000,
                     convert_system_message_to_human=True
@@ -71,12 +86,8 @@ class SchemeRAGSystem:
             self.llm = None
             self.gemini_enabled = False
         
-        # Initialize vector store
-        self.vector_store = None
-        self.qa_chain = None
-        
-        logger.info(f"Initialized SchemeRAGSystem with LangChain and Gemini 1.5 Pro")
-        
+        return self.gemini_enabled
+    
     def create_documents_from_schemes(self, schemes_data: List[Dict[str, Any]]) -> List[Document]:
         """Convert scheme data to LangChain Documents"""
         
@@ -423,8 +434,7 @@ def load_schemes_dataset(dataset_path: str) -> List[Dict[str, Any]]:
     
     console.print(f"[blue]Loading dataset from: {dataset_path}[/blue]")
     
-    with open(dataset_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_json(dataset_path)
     
     schemes = data.get('schemes', [])
     console.print(f"[green]✅ Loaded {len(schemes)} schemes[/green]")
@@ -4,16 +4,19 @@ This avoids LangChain's Gemini wrapper which may have rate limiting issues
 """
 
 import os
-import json
 import time
-from typing import List, Dict, Any, Optional
+import uuid
+import asyncio
+from typing import List, Dict, Any, Optional, Iterator
 from pathlib import Path
 import logging
+import numpy as np
 from dotenv import load_dotenv
 
 # Direct Google Generative AI imports
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
 
 # LangChain imports for vector store and text processing
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -25,17 +28,60 @@ from langchain.embeddings.base import Embeddings
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 
+from _io_helpers import load_json
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 console = Console()
 
+# HNSW parameters applied when the collection is first created. Embeddings
+# are L2-normalized before insertion, so inner product equals cosine.
+HNSW_COLLECTION_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:construction_ef": 200,
+    "hnsw:M": 32,
+    "hnsw:search_ef": 64,
+}
+
+# Prompt sections sent as separate content parts around the retrieved context.
+# Keeping them byte-identical across queries lets Gemini reuse the prefix.
+PROMPT_PREAMBLE = """You are a helpful assistant specializing in Indian Government Schemes. 
+Use the following context about government schemes to answer the user's question. 
+If you don't know the answer based on the context, just say that you don't have enough information.
+
+Context about relevant government schemes:"""
+
+PROMPT_GUIDELINES = """Please provide a helpful and accurate answer that:
+1. Addresses the user's specific question
+2. Mentions the most relevant government schemes
+3. Includes key details like eligibility, benefits when available
+4. Is easy to understand and actionable
+
+Answer:"""
+
+# Embedding requests in flight per aembed_documents call; the free tier's
+# per-minute quota is exhausted quickly, so keep this small
+EMBED_MAX_CONCURRENCY = 4
+
+# Quota (429) errors are retried this many times, waiting base * 2**attempt seconds
+EMBED_MAX_RETRIES = 5
+EMBED_BACKOFF_SECONDS = 2.0
+
+def l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place, leaving zero (fallback) vectors untouched"""
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+    return embeddings
+
 class DirectGeminiEmbeddings(Embeddings):
     """Direct Google Generative AI embeddings wrapper"""
     
-    def __init__(self, api_key: str, model: str = "models/embedding-001"):
+    def __init__(self, api_key: str, model: str = "models/embedding-001",
+                 max_concurrency: int = EMBED_MAX_CONCURRENCY):
         self.api_key = api_key
         self.model = model
+        self.max_concurrency = max_concurrency
         genai.configure(api_key=api_key)
         
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
@@ -61,7 +107,7 @@ class DirectGeminiEmbeddings(Embeddings):
                 embeddings.append([0.0] * 768)  # Standard embedding dimension
                 time.sleep(2)  # Longer delay on error
                 
-        return embeddings
+        return l2_normalize(np.asarray(embeddings, dtype=np.float32)).tolist()
     
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query"""
@@ -71,7 +117,48 @@ class DirectGeminiEmbeddings(Embeddings):
                 content=text,
                 task_type="retrieval_query"
             )
-            return result['embedding']
+            return l2_normalize(np.asarray(result['embedding'], dtype=np.float32)).tolist()
+        except Exception as e:
+            logger.error(f"Query embedding failed: {e}")
+            return [0.0] * 768  # Return zero vector as fallback
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents concurrently on one event loop
+        
+        Quota errors are retried with exponential backoff; any other failure, or
+        a quota error that outlasts the retries, is raised rather than returning
+        a zero vector that would match arbitrary queries.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def _one(i: int, text: str) -> List[float]:
+            async with semaphore:
+                for attempt in range(EMBED_MAX_RETRIES + 1):
+                    try:
+                        result = await genai.embed_content_async(
+                            model=self.model,
+                            content=text,
+                            task_type="retrieval_document"
+                        )
+                        return result['embedding']
+                    except (ResourceExhausted, TooManyRequests) as e:
+                        if attempt == EMBED_MAX_RETRIES:
+                            raise
+                        delay = EMBED_BACKOFF_SECONDS * 2 ** attempt
+                        logger.warning(f"Embedding quota hit for document {i}, retrying in {delay:.0f}s: {e}")
+                        await asyncio.sleep(delay)
+        
+        return await asyncio.gather(*[_one(i, text) for i, text in enumerate(texts)])
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a single query without blocking the event loop"""
+        try:
+            result = await genai.embed_content_async(
+                model=self.model,
+                content=text,
+                task_type="retrieval_query"
+            )
+            return l2_normalize(np.asarray(result['embedding'], dtype=np.float32)).tolist()
         except Exception as e:
             logger.error(f"Query embedding failed: {e}")
             return [0.0] * 768  # Return zero vector as fallback
@@ -217,8 +304,68 @@ class SchemeRAGSystemDirect:
         console.print(f"[green]✅ Created {len(documents)} documents[/green]")
         return documents
     
-    def setup_vector_store(self, documents: List[Document], chunk_size: int = 1000, chunk_overlap: int = 200):
-        """Set up ChromaDB vector store with documents"""
+    async def _embed_and_add_batches(self, collection, split_docs: List[Document],
+                                     batch_size: int = 20, max_concurrent_batches: int = 1):
+        """Embed and add document batches concurrently, cancelling all on first failure
+        
+        Each batch fans out to the embeddings' max_concurrency requests, so the
+        requests in flight are max_concurrent_batches * max_concurrency; the
+        defaults keep that within the free-tier quota.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent_batches)
+        total_batches = (len(split_docs) + batch_size - 1) // batch_size
+        
+        async def embed_and_add(batch_number: int, batch: List[Document]):
+            async with semaphore:
+                console.print(f"[blue]Processing batch {batch_number}/{total_batches}[/blue]")
+                
+                texts = [doc.page_content for doc in batch]
+                embeddings = l2_normalize(np.asarray(
+                    await self.embeddings.aembed_documents(texts), dtype=np.float32
+                ))
+                
+                # A zero or malformed vector would match arbitrary queries, so
+                # the batch fails instead of being written
+                if embeddings.ndim != 2 or not np.all(np.linalg.norm(embeddings, axis=1) > 0):
+                    raise ValueError(f"Batch {batch_number} returned empty or zero embeddings")
+                
+                await asyncio.to_thread(
+                    collection.add,
+                    ids=[str(uuid.uuid4()) for _ in batch],
+                    embeddings=embeddings,
+                    metadatas=[doc.metadata for doc in batch],
+                    documents=texts
+                )
+                
+                # Hold the slot briefly to respect rate limits
+                if batch_number < total_batches:
+                    await asyncio.sleep(3)
+        
+        tasks = [
+            asyncio.create_task(embed_and_add(i // batch_size + 1, split_docs[i:i + batch_size]))
+            for i in range(0, len(split_docs), batch_size)
+        ]
+        
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    def setup_vector_store(self, documents: List[Document], chunk_size: int = 1000, chunk_overlap: int = 200,
+                           full_rebuild: bool = False):
+        """Set up ChromaDB vector store with documents (for callers without a running event loop)"""
+        return asyncio.run(self.asetup_vector_store(documents, chunk_size, chunk_overlap, full_rebuild))
+    
+    async def asetup_vector_store(self, documents: List[Document], chunk_size: int = 1000, chunk_overlap: int = 200,
+                                  full_rebuild: bool = False):
+        """Set up ChromaDB vector store with documents from inside a running event loop
+        
+        full_rebuild marks documents as the whole dataset, which allows dropping
+        a collection built in another distance space; partial batches are refused.
+        """
         
         if not self.gemini_enabled:
             console.print("[red]❌ Cannot setup vector store without Gemini embeddings[/red]")
@@ -240,29 +387,32 @@ class SchemeRAGSystemDirect:
         console.print("[blue]Creating embeddings with rate limiting...[/blue]")
         
         try:
-            # Process documents in batches to respect rate limits
-            batch_size = 5  # Small batch size to avoid rate limits
+            # Reopen without creation metadata, which chromadb 0.4 would
+            # write over an existing collection's own settings
+            self._open_vector_store()
+            existing = self.vector_store._collection.count()
+            space = self._collection_space()
+            target_space = HNSW_COLLECTION_METADATA["hnsw:space"]
             
-            for i in range(0, len(split_docs), batch_size):
-                batch = split_docs[i:i + batch_size]
-                console.print(f"[blue]Processing batch {i//batch_size + 1}/{(len(split_docs) + batch_size - 1)//batch_size}[/blue]")
-                
-                if i == 0:
-                    # Create initial vector store
-                    self.vector_store = Chroma.from_documents(
-                        documents=batch,
-                        embedding=self.embeddings,
-                        persist_directory=str(self.chroma_persist_dir),
-                        collection_name="government_schemes"
+            if existing and space != target_space:
+                if not full_rebuild:
+                    console.print(
+                        f"[bold red]❌ Vector store holds {existing} chunks built in '{space}' space; "
+                        f"refusing to add a partial batch. Rebuild it from the full dataset "
+                        f"(POST /setup or setup_vector_store(..., full_rebuild=True))[/bold red]"
                     )
-                else:
-                    # Add to existing vector store
-                    self.vector_store.add_documents(batch)
-                
-                # Add delay between batches
-                if i + batch_size < len(split_docs):
-                    console.print("[yellow]Waiting to respect rate limits...[/yellow]")
-                    time.sleep(3)  # 3 second delay between batches
+                    return False
+                console.print(f"[bold yellow]⚠️ Dropping {existing} chunks built in '{space}' space to rebuild the vector store[/bold yellow]")
+            
+            if not existing or space != target_space:
+                # New (or rebuilt) collections are created with the HNSW settings
+                self.vector_store.delete_collection()
+                self._open_vector_store(HNSW_COLLECTION_METADATA)
+            collection = self.vector_store._collection
+            
+            # Process documents in batches; up to max_concurrent_batches are
+            # embedded and added at the same time
+            await self._embed_and_add_batches(collection, split_docs)
             
             console.print(f"[green]✅ Vector store created with {len(split_docs)} document chunks[/green]")
             return True
@@ -271,6 +421,20 @@ class SchemeRAGSystemDirect:
             console.print(f"[red]❌ Failed to create vector store: {e}[/red]")
             return False
     
+    def _open_vector_store(self, collection_metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Open (creating if missing) the schemes collection"""
+        self.vector_store = Chroma(
+            persist_directory=str(self.chroma_persist_dir),
+            embedding_function=self.embeddings,
+            collection_name="government_schemes",
+            collection_metadata=collection_metadata
+        )
+    
+    def _collection_space(self) -> str:
+        """Distance space of the open collection (Chroma defaults to l2)"""
+        metadata = self.vector_store._collection.metadata or {}
+        return metadata.get("hnsw:space", "l2")
+    
     def load_existing_vector_store(self):
         """Load existing ChromaDB vector store"""
         
@@ -279,14 +443,26 @@ class SchemeRAGSystemDirect:
             return False
         
         try:
-            self.vector_store = Chroma(
-                persist_directory=str(self.chroma_persist_dir),
-                embedding_function=self.embeddings,
-                collection_name="government_schemes"
-            )
+            # Opened without creation metadata so an existing collection
+            # keeps the settings it was built with
+            self._open_vector_store()
             
-            # Test if vector store has data
-            test_results = self.vector_store.similarity_search("test", k=1)
+            if self.vector_store._collection.count() == 0:
+                console.print("[yellow]⚠️ No existing vector store data found[/yellow]")
+                self.vector_store.delete_collection()
+                self.vector_store = None
+                return False
+            
+            space = self._collection_space()
+            if space != HNSW_COLLECTION_METADATA["hnsw:space"]:
+                console.print(
+                    f"[yellow]⚠️ Vector store was created with '{space}' space, not "
+                    f"'{HNSW_COLLECTION_METADATA['hnsw:space']}'; run setup to rebuild it[/yellow]"
+                )
+            
+            # Throwaway search pages the HNSW index into memory and
+            # confirms the vector store has data
+            self.vector_store.similarity_search("warmup", k=1)
             
             console.print(f"[green]✅ Loaded existing vector store with data[/green]")
             return True
@@ -295,8 +471,32 @@ class SchemeRAGSystemDirect:
             console.print(f"[yellow]⚠️ Could not load existing vector store: {e}[/yellow]")
             return False
     
-    def query(self, question: str, include_sources: bool = True) -> Dict[str, Any]:
-        """Query the RAG system using direct Gemini"""
+    def _stream_answer(self, prompt: List[str]) -> Iterator[str]:
+        """Yield the generated answer chunk by chunk as Gemini produces it"""
+        try:
+            response = self.llm.generate_content(
+                prompt,
+                stream=True,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.7,
+                    max_output_tokens=1000,
+                )
+            )
+            
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+                    
+        except Exception as e:
+            logger.error(f"Streaming generation failed: {e}")
+            yield "I'm sorry, I'm experiencing technical difficulties. Please try again in a moment."
+    
+    def query(self, question: str, include_sources: bool = True, stream: bool = False) -> Dict[str, Any]:
+        """Query the RAG system using direct Gemini
+        
+        With stream=True retrieval runs eagerly but "answer" is an iterator
+        of text chunks, so callers can forward the first tokens immediately.
+        """
         
         if not self.vector_store or not self.llm:
             return {
@@ -328,25 +528,21 @@ class SchemeRAGSystemDirect:
                     }
                     sources.append(source_info)
             
-            context = "\n\n".join(context_parts)
+            # Send the prompt as parts so the context is never concatenated
+            prompt = [
+                PROMPT_PREAMBLE,
+                *context_parts,
+                f"Question: {question}",
+                PROMPT_GUIDELINES,
+            ]
             
-            # Create prompt
-            prompt = f"""You are a helpful assistant specializing in Indian Government Schemes. 
-Use the following context about government schemes to answer the user's question. 
-If you don't know the answer based on the context, just say that you don't have enough information.
-
-Context about relevant government schemes:
-{context}
-
-Question: {question}
-
-Please provide a helpful and accurate answer that:
-1. Addresses the user's specific question
-2. Mentions the most relevant government schemes
-3. Includes key details like eligibility, benefits when available
-4. Is easy to understand and actionable
-
-Answer:"""
+            if stream:
+                return {
+                    "answer": self._stream_answer(prompt),
+                    "sources": sources,
+                    "total_sources": len(relevant_docs),
+                    "success": True
+                }
             
             # Generate response with rate limiting
             try:
@@ -414,8 +610,7 @@ def load_schemes_dataset(dataset_path: str) -> List[Dict[str, Any]]:
     
     console.print(f"[blue]Loading dataset from: {dataset_path}[/blue]")
     
-    with open(dataset_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_json(dataset_path)
     
     schemes = data.get('schemes', [])
     console.print(f"[green]✅ Loaded {len(schemes)} schemes[/green]")
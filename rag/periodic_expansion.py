@@ -3,16 +3,16 @@
 import json
 import os
 import time
-import requests
 from datetime import datetime, timedelta
 import sys
 
+from langchain_rag_direct import SchemeRAGSystemDirect
+
 class PeriodicDatasetExpander:
     """Gradually expand the RAG dataset to avoid rate limits"""
     
     def __init__(self):
         self.full_dataset_path = "../data/raw/mega_3000_state_schemes_20250727_150540.json"
-        self.current_dataset_path = "../data/raw/current_schemes.json"
         self.progress_file = "expansion_progress.json"
         self.batch_size = 500  # Schemes per batch
         self.api_calls_per_scheme = 2  # Estimate
@@ -36,59 +36,19 @@ class PeriodicDatasetExpander:
         with open(self.progress_file, 'w') as f:
             json.dump(progress, f, indent=2)
     
-    def create_incremental_dataset(self, start_index, end_index):
-        """Create dataset with schemes from start_index to end_index"""
-        
-        full_data = self.load_full_dataset()
-        all_schemes = full_data.get('schemes', [])
-        
-        # Get the subset
-        subset_schemes = all_schemes[start_index:end_index]
-        
-        # Create incremental dataset
-        incremental_data = {
-            "metadata": {
-                **full_data.get('metadata', {}),
-                "incremental_mode": True,
-                "batch_start": start_index,
-                "batch_end": end_index,
-                "batch_size": len(subset_schemes),
-                "total_original": len(all_schemes)
-            },
-            "schemes": subset_schemes
-        }
-        
-        # Save incremental dataset
-        with open(self.current_dataset_path, 'w') as f:
-            json.dump(incremental_data, f, indent=2)
-        
-        return len(subset_schemes)
-    
-    def test_server_health(self):
-        """Check if server is responsive"""
-        try:
-            response = requests.get("http://localhost:8000/health", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
-    
-    def setup_incremental_batch(self):
-        """Setup vector store with current incremental batch"""
+    def setup_incremental_batch(self, rag, subset_schemes):
+        """Add a batch of schemes to the vector store in-process"""
         try:
             print("🔧 Setting up vector store with current batch...")
-            response = requests.post("http://localhost:8000/setup", timeout=300)
+            documents = rag.create_documents_from_schemes(subset_schemes)
             
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ Batch setup successful: {result.get('status', 'Unknown')}")
+            if rag.setup_vector_store(documents):
+                print(f"✅ Batch setup successful: {len(documents)} documents added")
                 return True
             else:
-                print(f"❌ Batch setup failed: {response.status_code}")
+                print("❌ Batch setup failed")
                 return False
                 
-        except requests.exceptions.Timeout:
-            print("⏰ Setup timeout - batch might be too large")
-            return False
         except Exception as e:
             print(f"❌ Setup error: {e}")
             return False
@@ -99,10 +59,14 @@ class PeriodicDatasetExpander:
         print("🚀 PERIODIC DATASET EXPANSION")
         print("=" * 50)
         
-        if not self.test_server_health():
-            print("❌ Server not running. Start with: python3 langchain_api_server.py")
+        rag = SchemeRAGSystemDirect()
+        if not rag.gemini_enabled:
+            print("❌ Gemini not available. Set GOOGLE_API_KEY in .env")
             return False
         
+        if not rag.load_existing_vector_store():
+            print("📭 No existing vector store - it will be created with the first batch")
+        
         # Load data
         full_data = self.load_full_dataset()
         all_schemes = full_data.get('schemes', [])
@@ -132,12 +96,11 @@ class PeriodicDatasetExpander:
             print(f"\n📦 BATCH {batch_count}")
             print(f"Processing schemes {processed} to {end_index}")
             
-            # Create incremental dataset
-            batch_size = self.create_incremental_dataset(processed, end_index)
-            print(f"✅ Created batch with {batch_size} schemes")
+            subset_schemes = all_schemes[processed:end_index]
+            print(f"✅ Selected batch with {len(subset_schemes)} schemes")
             
             # Setup vector store
-            if self.setup_incremental_batch():
+            if self.setup_incremental_batch(rag, subset_schemes):
                 processed = end_index
                 progress["processed_count"] = processed
                 progress["total_schemes"] = total_schemes
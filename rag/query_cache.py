@@ -0,0 +1,189 @@
+"""
+Query caching for the Government Schemes RAG engine
+Semantic cache that matches paraphrased queries by embedding similarity,
+and a persistent content-addressed cache for query embeddings
+"""
+
+import numpy as np
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from pathlib import Path
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """Random-projection LSH cache keyed on L2-normalized query embeddings"""
+
+    def __init__(self, embedding_dim: int = 1536, num_tables: int = 4,
+                 bits_per_table: int = 16, similarity_threshold: float = 0.95,
+                 ttl: float = 3600, seed: int = 42, max_entries: int = 10000):
+        self.embedding_dim = embedding_dim
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # One random hyperplane per hash bit, shared by all tables
+        rng = np.random.default_rng(seed)
+        self.projections = rng.standard_normal(
+            (num_tables * bits_per_table, embedding_dim)
+        ).astype(np.float32)
+
+        # entry id -> (embedding, value, timestamp, bucket keys), oldest first
+        self.entries: "OrderedDict[int, Tuple[np.ndarray, Any, float, List[Tuple]]]" = OrderedDict()
+        # bucket key -> ids of the entries hashed into it
+        self.buckets: Dict[Tuple, List[int]] = {}
+        self._next_id = 0
+
+        # Shared by the API's worker threads, so serialize access
+        self._lock = threading.Lock()
+
+    def _normalize(self, embedding: np.ndarray) -> Optional[np.ndarray]:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return None
+        return embedding / norm
+
+    def _bucket_keys(self, embedding: np.ndarray, namespace: Hashable) -> List[Tuple]:
+        """Hash the embedding into one bucket per LSH table"""
+        bits = (self.projections @ embedding) > 0
+        packed = np.packbits(bits.reshape(self.num_tables, self.bits_per_table), axis=1)
+        return [(namespace, table, packed[table].tobytes()) for table in range(self.num_tables)]
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry from the entry map and its buckets (caller holds the lock)"""
+        _, _, _, keys = self.entries.pop(entry_id)
+        for key in keys:
+            bucket = self.buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self.buckets[key]
+
+    def get(self, embedding: np.ndarray, namespace: Hashable = None) -> Optional[Any]:
+        """Return a cached value for a sufficiently similar embedding, if any"""
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+
+        keys = self._bucket_keys(query, namespace)
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                for entry_id in self.buckets.get(key, ()):
+                    cached_embedding, value, timestamp, _ = self.entries[entry_id]
+                    if now - timestamp >= self.ttl:
+                        continue
+                    if float(np.dot(query, cached_embedding)) >= self.similarity_threshold:
+                        return value
+
+        return None
+
+    def put(self, embedding: np.ndarray, value: Any, namespace: Hashable = None,
+            timestamp: Optional[float] = None) -> None:
+        """Store a value under the embedding's LSH buckets"""
+        query = self._normalize(embedding)
+        if query is None:
+            return
+
+        keys = self._bucket_keys(query, namespace)
+        now = time.time()
+        with self._lock:
+            # Entries are kept oldest first, so expired ones sit at the front
+            while self.entries:
+                oldest_id, (_, _, oldest_timestamp, _) = next(iter(self.entries.items()))
+                if now - oldest_timestamp < self.ttl:
+                    break
+                self._remove(oldest_id)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self.entries[entry_id] = (query, value, timestamp if timestamp is not None else now, keys)
+            for key in keys:
+                self.buckets.setdefault(key, []).append(entry_id)
+
+            # Evict first-in entries beyond the cap
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def save(self, filepath: str) -> None:
+        """Persist unexpired (namespace, embedding, value, timestamp) entries"""
+        now = time.time()
+        with self._lock:
+            entries = [
+                (keys[0][0], embedding, value, timestamp)
+                for embedding, value, timestamp, keys in self.entries.values()
+                if now - timestamp < self.ttl
+            ]
+
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'wb') as f:
+            pickle.dump(entries, f)
+
+        logger.info(f"Saved {len(entries)} semantic cache entries to {filepath}")
+
+    def load(self, filepath: str) -> None:
+        """Warm the cache from entries written by save()"""
+        filepath = Path(filepath)
+        if not filepath.exists():
+            return
+
+        with open(filepath, 'rb') as f:
+            entries = pickle.load(f)
+
+        # Re-insert oldest first to keep the eviction order
+        now = time.time()
+        loaded = 0
+        for namespace, embedding, value, timestamp in sorted(entries, key=lambda e: e[3]):
+            if now - timestamp < self.ttl:
+                self.put(embedding, value, namespace=namespace, timestamp=timestamp)
+                loaded += 1
+
+        logger.info(f"Warmed semantic cache with {loaded} entries from {filepath}")
+
+class EmbeddingCache:
+    """SQLite-backed embedding store keyed by content hash, stored as float16"""
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Shared by the API's worker threads, so serialize access
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float16).astype(np.float32)
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        vector = np.asarray(embedding, dtype=np.float16).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, vector)
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
@@ -5,24 +5,104 @@ Main retrieval-augmented generation implementation
 
 import numpy as np
 import json
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator, AsyncIterator, Union
 from pathlib import Path
 import logging
-from dataclasses import dataclass
-from vector_store import SchemeVectorStore, SchemeDocument
+from dataclasses import dataclass, replace, asdict
+from vector_store import SchemeVectorStore
+from query_cache import SemanticCache, EmbeddingCache
+from _rerank_kernel import rerank_topk
 import re
 import time
+import asyncio
+import hashlib
+import functools
+import queue
+import threading
+from concurrent.futures import Future
+from collections import OrderedDict
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
     OpenAI = None
+    AsyncOpenAI = None
+
+try:
+    from sklearn.feature_extraction.text import HashingVectorizer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+    HashingVectorizer = None
+
+from _io_helpers import ORJSON_AVAILABLE, orjson, json_loads
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+    diskcache = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Filter vocabularies, in match priority order
+INDIAN_STATES = [
+    "andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh",
+    "goa", "gujarat", "haryana", "himachal pradesh", "jharkhand", "karnataka",
+    "kerala", "madhya pradesh", "maharashtra", "manipur", "meghalaya", "mizoram",
+    "nagaland", "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu",
+    "telangana", "tripura", "uttar pradesh", "uttarakhand", "west bengal",
+    "delhi", "chandigarh", "dadra and nagar haveli", "daman and diu",
+    "lakshadweep", "puducherry", "andaman and nicobar islands", "ladakh",
+    "jammu and kashmir"
+]
+
+CATEGORY_KEYWORDS = {
+    'agriculture': ['farming', 'farmer', 'agriculture', 'crop', 'irrigation'],
+    'education': ['education', 'student', 'school', 'scholarship', 'learning'],
+    'health': ['health', 'medical', 'hospital', 'doctor', 'healthcare'],
+    'employment': ['job', 'employment', 'skill', 'training', 'career'],
+    'women': ['women', 'girl', 'mother', 'female'],
+    'youth': ['youth', 'young', 'teenager'],
+    'senior citizens': ['senior', 'elderly', 'old age', 'pension'],
+    'disability': ['disability', 'disabled', 'differently abled'],
+    'housing': ['house', 'home', 'housing', 'shelter'],
+    'business': ['business', 'entrepreneur', 'startup', 'msme']
+}
+
+# Single-pass filter matchers, compiled once at import. Alternatives are
+# longest-first so overlapping terms match the most specific one
+_STATE_PRIORITY = {state: priority for priority, state in enumerate(INDIAN_STATES)}
+_STATE_TITLES = {state: state.title() for state in INDIAN_STATES}
+_STATE_RE = re.compile(
+    r'\b(' + '|'.join(map(re.escape, sorted(INDIAN_STATES, key=len, reverse=True))) + r')\b'
+)
+
+# One named group per category; only a leading boundary so plurals still match
+_CATEGORY_GROUPS = {re.sub(r'\W', '_', category): category for category in CATEGORY_KEYWORDS}
+_CATEGORY_PRIORITY = {category: priority for priority, category in enumerate(CATEGORY_KEYWORDS)}
+_CATEGORY_TITLES = {category: category.title() for category in CATEGORY_KEYWORDS}
+_CATEGORY_RE = re.compile(r'\b(?:' + '|'.join(
+    f'(?P<{group}>' + '|'.join(map(re.escape, sorted(CATEGORY_KEYWORDS[category], key=len, reverse=True))) + ')'
+    for group, category in _CATEGORY_GROUPS.items()
+) + ')')
+
+# Kept byte-identical across requests so the provider's prompt prefix cache
+# (OpenAI automatic caching, vLLM --enable-prefix-caching) can reuse it
+RESPONSE_SYSTEM_PROMPT = """You are a helpful assistant that provides information about Indian government schemes.
+Based on the user's query and the relevant schemes provided, give a comprehensive and helpful response.
+Focus on the most relevant schemes and provide practical guidance.
+
+Please provide a helpful response that:
+1. Addresses the user's specific query
+2. Recommends the most relevant schemes
+3. Provides key details like eligibility, benefits, and application process
+4. Is easy to understand and actionable"""
+
 @dataclass
 class QueryResult:
     """Represents a query result from the RAG system"""
@@ -33,13 +113,82 @@ class QueryResult:
     processing_time: float
     metadata: Dict[str, Any]
 
+def _json_default(obj: Any) -> Any:
+    # numpy scalars/arrays expose tolist(); anything else is stringified
+    return obj.tolist() if hasattr(obj, 'tolist') else str(obj)
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=_json_default, option=option)
+    return json.dumps(obj, default=_json_default, sort_keys=sort_keys).encode()
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available"""
+    return json_loads(data)
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batched API calls"""
+    
+    def __init__(self, embed_fn: Callable[[List[str]], List[np.ndarray]],
+                 max_batch_size: int = 32, flush_interval: float = 0.01):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+    
+    def submit(self, text: str) -> Future:
+        """Queue a text for embedding; the future resolves to its vector"""
+        future = Future()
+        self._queue.put((text, future))
+        return future
+    
+    def _run(self) -> None:
+        while True:
+            # Block for the first request, then collect more until the
+            # batch is full or the flush window closes
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                embeddings = self.embed_fn([text for text, _ in batch])
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
 class GovernmentSchemeRAG:
     """RAG implementation for government schemes"""
     
     def __init__(self, vector_store_path: str = "data/embeddings/scheme_vector_store",
                  openai_api_key: Optional[str] = None, 
                  embedding_model: str = "text-embedding-3-small",
-                 chat_model: str = "gpt-3.5-turbo"):
+                 chat_model: str = "gpt-3.5-turbo",
+                 semantic_cache_path: Optional[str] = "data/embeddings/semantic_cache.pkl",
+                 embedding_batch_size: int = 32,
+                 embedding_flush_interval: float = 0.01,
+                 nprobe: int = 16,
+                 quantization: str = "fp32",
+                 query_cache_dir: Optional[str] = "data/rag_query_cache",
+                 embedding_cache_path: Optional[str] = "data/embeddings/query_embeddings.sqlite",
+                 warmup_queries_path: Optional[str] = None,
+                 chat_base_url: Optional[str] = None,
+                 cache_max: int = 1024,
+                 search_shards: Optional[int] = None):
         
         self.vector_store_path = Path(vector_store_path)
         self.embedding_model = embedding_model
@@ -48,166 +197,376 @@ class GovernmentSchemeRAG:
         # Initialize OpenAI client if available
         if OPENAI_AVAILABLE and openai_api_key:
             self.client = OpenAI(api_key=openai_api_key)
+            # Optionally serve chat from an OpenAI-compatible endpoint such as a
+            # self-hosted vLLM server started with --enable-prefix-caching
+            self.chat_client = OpenAI(api_key=openai_api_key, base_url=chat_base_url) if chat_base_url else self.client
+            self.async_chat_client = AsyncOpenAI(api_key=openai_api_key, base_url=chat_base_url)
             self.openai_enabled = True
+            self.embedding_batcher = EmbeddingBatcher(
+                self._embed_texts,
+                max_batch_size=embedding_batch_size,
+                flush_interval=embedding_flush_interval
+            )
+            
+            # Content-addressed embedding cache: in-process LRU over SQLite
+            self.embedding_cache = EmbeddingCache(embedding_cache_path) if embedding_cache_path else None
+            self._cached_embedding = functools.lru_cache(maxsize=10000)(self._fetch_embedding)
+            if warmup_queries_path:
+                self._warm_embedding_cache(warmup_queries_path)
         else:
             self.client = None
+            self.chat_client = None
+            self.async_chat_client = None
             self.openai_enabled = False
+            self.embedding_batcher = None
+            self.embedding_cache = None
             logger.warning("OpenAI not available. Running in offline mode.")
         
         # Load vector store
-        self.vector_store = SchemeVectorStore()
+        self.vector_store = SchemeVectorStore(nprobe=nprobe)
         if self.vector_store_path.with_suffix('.faiss').exists():
-            self.vector_store.load(str(self.vector_store_path))
+            self.vector_store.load(str(self.vector_store_path), mmap=True)
+            self.vector_store.quantize(quantization)
             logger.info(f"Loaded vector store with {len(self.vector_store.documents)} schemes")
         else:
             logger.warning(f"Vector store not found at {self.vector_store_path}")
         
-        # Query cache for performance
-        self.query_cache = {}
+        # Offline mode: deterministic hashed TF-IDF vectors for both queries and schemes
+        self._offline_vectorizer = None
+        if not self.openai_enabled:
+            if SKLEARN_AVAILABLE:
+                self._offline_vectorizer = HashingVectorizer(
+                    n_features=self.vector_store.embedding_dim,
+                    alternate_sign=False,
+                    norm='l2',
+                    ngram_range=(1, 2),
+                    dtype=np.float32
+                )
+                self._build_offline_index()
+                self.vector_store.quantize(quantization)
+            else:
+                logger.warning("scikit-learn not available. Offline search will use random embeddings.")
+        
+        # Spread single-query flat scans across cores (defaults to one shard per CPU)
+        self.vector_store.shard(search_shards)
+        
+        # Fault in memory-mapped index pages before the first real query
+        self.vector_store.warmup()
+        
+        # Chat model and index build go into every query cache key, so answers
+        # cached against another model or an older index are not reused
+        faiss_path = self.vector_store_path.with_suffix('.faiss')
+        index_mtime = faiss_path.stat().st_mtime_ns if faiss_path.exists() else 0
+        self._cache_stamp = f"{self.chat_model}|{self.vector_store.index.ntotal}|{index_mtime}"
+        
+        # Query cache for performance; on disk it is shared by all API workers
         self.cache_timeout = 3600  # 1 hour
+        self.query_cache_persistent = DISKCACHE_AVAILABLE and bool(query_cache_dir)
+        if self.query_cache_persistent:
+            self.query_cache = diskcache.Cache(
+                query_cache_dir,
+                size_limit=2**30,
+                eviction_policy='least-recently-used'
+            )
+            self._start_cache_compactor()
+        else:
+            # Bounded in-process LRU of (result, timestamp)
+            self.query_cache: OrderedDict = OrderedDict()
+            self.cache_max = cache_max
+            self._query_cache_lock = threading.Lock()
+        
+        # Semantic cache so paraphrased queries skip search and generation
+        self.semantic_cache_path = Path(semantic_cache_path) if semantic_cache_path else None
+        self.semantic_cache = SemanticCache(ttl=self.cache_timeout)
+        if self.semantic_cache_path:
+            self.semantic_cache.load(str(self.semantic_cache_path))
+    
+    def _start_cache_compactor(self, interval: float = 300) -> None:
+        """Periodically purge expired entries from the disk cache"""
+        def compact():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.query_cache.expire()
+                except Exception as e:
+                    logger.warning(f"Query cache compaction failed: {e}")
+        
+        threading.Thread(target=compact, name="query-cache-compactor", daemon=True).start()
+    
+    def _query_cache_key(self, user_query: str, max_schemes: int,
+                         additional_filters: Optional[Dict[str, Any]]) -> str:
+        """Stable cache key shared across processes"""
+        payload = "|".join([
+            self._cache_stamp,
+            user_query.strip().lower(),
+            str(max_schemes),
+            dumps(additional_filters, sort_keys=True).decode()
+        ])
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+    
+    def _get_cached_query(self, cache_key: str) -> Optional[QueryResult]:
+        if self.query_cache_persistent:
+            # Stored as JSON bytes so entries are portable across workers and versions
+            cached = self.query_cache.get(cache_key)
+            return QueryResult(**loads(cached)) if cached is not None else None
+        
+        with self._query_cache_lock:
+            entry = self.query_cache.get(cache_key)
+            if entry is None:
+                return None
+            cached_result, timestamp = entry
+            if time.time() - timestamp >= self.cache_timeout:
+                del self.query_cache[cache_key]
+                return None
+            self.query_cache.move_to_end(cache_key)
+            return cached_result
+    
+    def _set_cached_query(self, cache_key: str, result: QueryResult) -> None:
+        if self.query_cache_persistent:
+            self.query_cache.set(cache_key, dumps(asdict(result)), expire=self.cache_timeout)
+            return
+        
+        now = time.time()
+        with self._query_cache_lock:
+            self.query_cache[cache_key] = (result, now)
+            self.query_cache.move_to_end(cache_key)
+            
+            # Evict expired entries from the cold end, then enforce the size bound
+            while self.query_cache:
+                _, (_, timestamp) = next(iter(self.query_cache.items()))
+                if now - timestamp < self.cache_timeout:
+                    break
+                self.query_cache.popitem(last=False)
+            while len(self.query_cache) > self.cache_max:
+                self.query_cache.popitem(last=False)
+    
+    def _embed_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts with a single API call"""
+        response = self.client.embeddings.create(
+            model=self.embedding_model,
+            input=texts
+        )
+        data = sorted(response.data, key=lambda d: d.index)
+        return [np.array(d.embedding) for d in data]
+    
+    def _embedding_cache_key(self, text: str) -> str:
+        return hashlib.blake2b(f"{self.embedding_model}:{text.lower()}".encode()).hexdigest()
+    
+    def _fetch_embedding(self, key: str, text: str) -> np.ndarray:
+        """Embedding from the persistent cache, falling back to the API"""
+        if self.embedding_cache is not None:
+            embedding = self.embedding_cache.get(key)
+            if embedding is not None:
+                return embedding
+        
+        embedding = self.embedding_batcher.submit(text).result()
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(key, embedding)
+        return embedding
+    
+    def _warm_embedding_cache(self, queries_path: str) -> None:
+        """Pre-embed frequently asked queries listed one per line"""
+        path = Path(queries_path)
+        if not path.exists():
+            logger.warning(f"Warmup queries not found at {path}")
+            return
+        
+        queries = []
+        for line in path.read_text(encoding='utf-8').splitlines():
+            line = line.strip().strip('"')
+            if line and not line.startswith('#'):
+                queries.append(line)
+        
+        missing = [q for q in queries
+                   if self.embedding_cache is None or self.embedding_cache.get(self._embedding_cache_key(q)) is None]
+        try:
+            if missing:
+                for text, embedding in zip(missing, self._embed_texts(missing)):
+                    if self.embedding_cache is not None:
+                        self.embedding_cache.put(self._embedding_cache_key(text), embedding)
+            for text in queries:
+                self._cached_embedding(self._embedding_cache_key(text), text)
+            logger.info(f"Warmed embedding cache with {len(queries)} queries ({len(missing)} embedded)")
+        except Exception as e:
+            logger.warning(f"Failed to warm embedding cache: {e}")
     
     def _get_query_embedding(self, query: str) -> Optional[np.ndarray]:
         """Get embedding for user query"""
         if not self.openai_enabled:
+            if self._offline_vectorizer is not None:
+                return self._offline_embed([query])[0]
             # Fallback: use random embedding for demo
-            return np.random.random(1536)
+            return np.random.random(self.vector_store.embedding_dim)
         
         try:
-            response = self.client.embeddings.create(
-                model=self.embedding_model,
-                input=query
-            )
-            return np.array(response.data[0].embedding)
+            text = query.strip()
+            return self._cached_embedding(self._embedding_cache_key(text), text)
         except Exception as e:
             logger.error(f"Failed to get query embedding: {e}")
             return None
     
+    def _offline_embed(self, texts: List[str]) -> np.ndarray:
+        # The vectorizer emits float32, so densifying makes no float64 copy of the corpus
+        return self._offline_vectorizer.transform(texts).toarray()
+    
+    def _build_offline_index(self) -> None:
+        """Re-embed the loaded schemes with the offline vectorizer so they match offline queries"""
+        documents = self.vector_store.documents
+        if not documents:
+            return
+        
+        embeddings = self._offline_embed([doc.content for doc in documents])
+        offline_store = SchemeVectorStore(embedding_dim=self.vector_store.embedding_dim,
+                                          nprobe=self.vector_store.nprobe)
+        offline_store.add_documents(documents, embeddings)
+        self.vector_store = offline_store
+        logger.info(f"Built offline hashed-TF-IDF index for {len(documents)} schemes")
+    
     def _extract_query_filters(self, query: str) -> Dict[str, Any]:
         """Extract filters from natural language query"""
-        filters = {}
         query_lower = query.lower()
         
-        # State extraction
-        indian_states = [
-            "andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh",
-            "goa", "gujarat", "haryana", "himachal pradesh", "jharkhand", "karnataka",
-            "kerala", "madhya pradesh", "maharashtra", "manipur", "meghalaya", "mizoram",
-            "nagaland", "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu",
-            "telangana", "tripura", "uttar pradesh", "uttarakhand", "west bengal",
-            "delhi", "chandigarh", "dadra and nagar haveli", "daman and diu",
-            "lakshadweep", "puducherry", "andaman and nicobar islands", "ladakh",
-            "jammu and kashmir"
-        ]
+        filters = {}
         
-        for state in indian_states:
-            if state in query_lower:
-                filters['state_name'] = state.title()
-                break
-        
-        # Category keywords
-        category_keywords = {
-            'agriculture': ['farming', 'farmer', 'agriculture', 'crop', 'irrigation'],
-            'education': ['education', 'student', 'school', 'scholarship', 'learning'],
-            'health': ['health', 'medical', 'hospital', 'doctor', 'healthcare'],
-            'employment': ['job', 'employment', 'skill', 'training', 'career'],
-            'women': ['women', 'girl', 'mother', 'female'],
-            'youth': ['youth', 'young', 'teenager'],
-            'senior citizens': ['senior', 'elderly', 'old age', 'pension'],
-            'disability': ['disability', 'disabled', 'differently abled'],
-            'housing': ['house', 'home', 'housing', 'shelter'],
-            'business': ['business', 'entrepreneur', 'startup', 'msme']
-        }
+        # Earliest-listed state/category wins when several are mentioned
+        state = min((m.group(1) for m in _STATE_RE.finditer(query_lower)),
+                    key=_STATE_PRIORITY.__getitem__, default=None)
+        if state:
+            filters['state_name'] = _STATE_TITLES[state]
         
-        for category, keywords in category_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                filters['category'] = category.title()
-                break
+        category = min((_CATEGORY_GROUPS[m.lastgroup] for m in _CATEGORY_RE.finditer(query_lower)),
+                       key=_CATEGORY_PRIORITY.__getitem__, default=None)
+        if category:
+            filters['category'] = _CATEGORY_TITLES[category]
         
         return filters
     
-    def _rank_schemes_by_relevance(self, schemes: List[Tuple[SchemeDocument, float]], 
-                                  query: str) -> List[Dict[str, Any]]:
-        """Rank and format schemes by relevance"""
-        ranked_schemes = []
+    def _rank_schemes_by_relevance(self, row_ids: np.ndarray, similarity_scores: np.ndarray,
+                                  query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank and format schemes, given as vector store row ids, by relevance"""
+        store = self.vector_store
+        
+        # Tokenize the query once; scheme-name tokens are precomputed by the store
+        query_words = set(query.lower().split())
+        name_overlaps = np.fromiter(
+            (len(query_words.intersection(store.name_tokens[row])) for row in row_ids),
+            dtype=np.float64, count=len(row_ids)
+        )
         
-        for doc, similarity_score in schemes:
-            # Calculate additional relevance factors
-            relevance_score = similarity_score
-            
-            # Boost score if query terms appear in scheme name
-            query_words = set(query.lower().split())
-            scheme_name_words = set(doc.metadata.get('scheme_name', '').lower().split())
-            name_overlap = len(query_words.intersection(scheme_name_words))
-            if name_overlap > 0:
-                relevance_score += 0.1 * name_overlap
-            
-            # Format scheme for response
-            scheme_info = {
-                'scheme_id': doc.metadata.get('scheme_id', ''),
-                'scheme_name': doc.metadata.get('scheme_name', ''),
-                'category': doc.metadata.get('category', ''),
-                'state': doc.metadata.get('state_name', ''),
-                'ministry': doc.metadata.get('implementing_ministry', ''),
-                'description': doc.content[:500] + "..." if len(doc.content) > 500 else doc.content,
-                'relevance_score': float(relevance_score),
-                'similarity_score': float(similarity_score)
-            }
-            
-            ranked_schemes.append(scheme_info)
+        # Boost by name overlap and select the top-K in one compiled pass
+        top_indices, relevance_scores = rerank_topk(
+            similarity_scores, name_overlaps, len(row_ids) if top_k is None else top_k
+        )
         
-        # Sort by relevance score
-        ranked_schemes.sort(key=lambda x: x['relevance_score'], reverse=True)
+        # Gather only the returned rows from the metadata columns
+        rows = row_ids[top_indices]
+        scheme_ids = store.column('scheme_id')[rows]
+        scheme_names = store.column('scheme_name')[rows]
+        categories = store.column('category')[rows]
+        states = store.column('state_name')[rows]
+        ministries = store.column('implementing_ministry')[rows]
+        content_lens = store.column('content_len')[rows]
+        
+        ranked_schemes = []
+        for j, row in enumerate(rows):
+            content = store.documents[row].content
+            ranked_schemes.append({
+                'scheme_id': scheme_ids[j],
+                'scheme_name': scheme_names[j],
+                'category': categories[j],
+                'state': states[j],
+                'ministry': ministries[j],
+                'description': content[:500] + "..." if content_lens[j] > 500 else content,
+                'relevance_score': float(relevance_scores[j]),
+                'similarity_score': float(similarity_scores[top_indices[j]])
+            })
         
         return ranked_schemes
     
-    def _generate_response(self, query: str, relevant_schemes: List[Dict[str, Any]]) -> str:
-        """Generate natural language response using retrieved schemes"""
+    def _chat_messages(self, query: str, relevant_schemes: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages for response generation"""
+        
+        # Prepare context from the top 5 schemes, most relevant first
+        context_schemes = relevant_schemes[:5]
+        context = "".join(
+            f"\n{i}. {scheme['scheme_name']} ({scheme['category']})\n"
+            f"   State: {scheme['state']}\n"
+            f"   Ministry: {scheme['ministry']}\n"
+            f"   Description: {scheme['description'][:300]}...\n"
+            for i, scheme in enumerate(context_schemes, 1)
+        )
+        
+        # Stable content first, the user's query last, to maximize the cached prefix
+        user_prompt = f"""Relevant Government Schemes:
+{context}
+User Query: {query}"""
+        
+        return [
+            {"role": "system", "content": RESPONSE_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _generate_response(self, query: str, relevant_schemes: List[Dict[str, Any]]) -> Iterator[str]:
+        """Generate natural language response using retrieved schemes, yielded as it streams in"""
         
         if not self.openai_enabled:
-            return self._generate_fallback_response(query, relevant_schemes)
-        
-        # Prepare context from relevant schemes
-        context = ""
-        for i, scheme in enumerate(relevant_schemes[:5], 1):  # Top 5 schemes
-            context += f"\n{i}. {scheme['scheme_name']} ({scheme['category']})\n"
-            context += f"   State: {scheme['state']}\n"
-            context += f"   Ministry: {scheme['ministry']}\n"
-            context += f"   Description: {scheme['description'][:300]}...\n"
-        
-        # Create prompt
-        system_prompt = """You are a helpful assistant that provides information about Indian government schemes. 
-        Based on the user's query and the relevant schemes provided, give a comprehensive and helpful response.
-        Focus on the most relevant schemes and provide practical guidance."""
-        
-        user_prompt = f"""
-        User Query: {query}
-        
-        Relevant Government Schemes:
-        {context}
-        
-        Please provide a helpful response that:
-        1. Addresses the user's specific query
-        2. Recommends the most relevant schemes
-        3. Provides key details like eligibility, benefits, and application process
-        4. Is easy to understand and actionable
-        """
+            yield self._generate_fallback_response(query, relevant_schemes)
+            return
         
+        streamed_any = False
         try:
-            response = self.client.chat.completions.create(
+            response = self.chat_client.chat.completions.create(
                 model=self.chat_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self._chat_messages(query, relevant_schemes),
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7,
+                stream=True
             )
             
-            return response.choices[0].message.content
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    streamed_any = True
+                    yield delta
             
         except Exception as e:
             logger.error(f"Failed to generate AI response: {e}")
-            return self._generate_fallback_response(query, relevant_schemes)
+            # Text already sent to the caller cannot be retracted, so only
+            # fall back when the stream failed before producing anything
+            if not streamed_any:
+                yield self._generate_fallback_response(query, relevant_schemes)
+    
+    async def _agenerate_response(self, query: str, relevant_schemes: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Async counterpart of _generate_response using AsyncOpenAI"""
+        
+        if not self.openai_enabled:
+            yield self._generate_fallback_response(query, relevant_schemes)
+            return
+        
+        streamed_any = False
+        try:
+            response = await self.async_chat_client.chat.completions.create(
+                model=self.chat_model,
+                messages=self._chat_messages(query, relevant_schemes),
+                max_tokens=1000,
+                temperature=0.7,
+                stream=True
+            )
+            
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    streamed_any = True
+                    yield delta
+            
+        except Exception as e:
+            logger.error(f"Failed to generate AI response: {e}")
+            if not streamed_any:
+                yield self._generate_fallback_response(query, relevant_schemes)
     
     def _generate_fallback_response(self, query: str, relevant_schemes: List[Dict[str, Any]]) -> str:
         """Generate response without AI (fallback mode)"""
@@ -215,38 +574,67 @@ class GovernmentSchemeRAG:
         if not relevant_schemes:
             return "I couldn't find any relevant government schemes for your query. Please try rephrasing your question or contact the relevant government department."
         
-        response = f"Based on your query '{query}', here are the most relevant government schemes:\n\n"
+        parts = [f"Based on your query '{query}', here are the most relevant government schemes:\n\n"]
         
-        for i, scheme in enumerate(relevant_schemes[:3], 1):
-            response += f"{i}. **{scheme['scheme_name']}**\n"
-            response += f"   • Category: {scheme['category']}\n"
-            response += f"   • State: {scheme['state']}\n"
-            response += f"   • Ministry: {scheme['ministry']}\n"
-            response += f"   • Description: {scheme['description'][:200]}...\n\n"
+        parts.extend(
+            f"{i}. **{scheme['scheme_name']}**\n"
+            f"   • Category: {scheme['category']}\n"
+            f"   • State: {scheme['state']}\n"
+            f"   • Ministry: {scheme['ministry']}\n"
+            f"   • Description: {scheme['description'][:200]}...\n\n"
+            for i, scheme in enumerate(relevant_schemes[:3], 1)
+        )
         
         if len(relevant_schemes) > 3:
-            response += f"Found {len(relevant_schemes)} total schemes. The above are the most relevant matches.\n"
+            parts.append(f"Found {len(relevant_schemes)} total schemes. The above are the most relevant matches.\n")
         
-        response += "\nFor detailed information about eligibility and application process, please visit the official government portals or contact the implementing agencies."
+        parts.append("\nFor detailed information about eligibility and application process, please visit the official government portals or contact the implementing agencies.")
         
-        return response
+        return "".join(parts)
     
     def query(self, user_query: str, max_schemes: int = 10, 
-              additional_filters: Optional[Dict[str, Any]] = None) -> QueryResult:
-        """Main query function for the RAG system"""
+              additional_filters: Optional[Dict[str, Any]] = None,
+              stream: bool = False) -> Union[QueryResult, Iterator[Tuple[str, Optional[QueryResult]]]]:
+        """Main query function for the RAG system
         
-        start_time = time.time()
+        With stream=True, returns an iterator of (partial_response, None) pairs as
+        the answer is generated, followed by a final ("", QueryResult) pair.
+        """
         
-        # Check cache
-        cache_key = f"{user_query}_{max_schemes}_{str(additional_filters)}"
-        if cache_key in self.query_cache:
-            cached_result, timestamp = self.query_cache[cache_key]
-            if time.time() - timestamp < self.cache_timeout:
-                logger.info("Returning cached result")
-                return cached_result
-        
-        # Get query embedding
-        query_embedding = self._get_query_embedding(user_query)
+        if stream:
+            return self._query_stream(user_query, max_schemes, additional_filters)
+        
+        for _, result in self._query_stream(user_query, max_schemes, additional_filters):
+            if result is not None:
+                return result
+    
+    async def aquery(self, user_query: str, max_schemes: int = 10,
+                     additional_filters: Optional[Dict[str, Any]] = None,
+                     stream: bool = False) -> Union[QueryResult, AsyncIterator[Tuple[str, Optional[QueryResult]]]]:
+        """Async query() for event-loop callers; blocking work runs in worker threads"""
+        
+        if stream:
+            return self._aquery_stream(user_query, max_schemes, additional_filters)
+        
+        async for _, result in self._aquery_stream(user_query, max_schemes, additional_filters):
+            if result is not None:
+                return result
+    
+    def _query_filters(self, user_query: str, additional_filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Filters extracted from the query, overridden by explicit ones"""
+        query_filters = self._extract_query_filters(user_query)
+        if additional_filters:
+            query_filters.update(additional_filters)
+        return query_filters
+    
+    @staticmethod
+    def _semantic_namespace(max_schemes: int, query_filters: Dict[str, Any]) -> Tuple:
+        """Semantic cache namespace; paraphrases only share results under the same resolved filters"""
+        return (max_schemes, str(sorted(query_filters.items())))
+    
+    def _precomputed_result(self, user_query: str, query_embedding: Optional[np.ndarray],
+                            cache_namespace: Tuple, start_time: float) -> Optional[QueryResult]:
+        """Result that needs no retrieval: an embedding failure or a semantic cache hit"""
         if query_embedding is None:
             return QueryResult(
                 query=user_query,
@@ -257,23 +645,31 @@ class GovernmentSchemeRAG:
                 metadata={'error': 'Failed to generate query embedding'}
             )
         
-        # Extract filters from query
-        query_filters = self._extract_query_filters(user_query)
-        if additional_filters:
-            query_filters.update(additional_filters)
+        # Check semantic cache (offline responses echo the query text, so skip it)
+        if self.openai_enabled:
+            cached_result = self.semantic_cache.get(query_embedding, namespace=cache_namespace)
+            if cached_result is not None:
+                logger.info("Returning semantically cached result")
+                return replace(cached_result, query=user_query,
+                               processing_time=time.time() - start_time)
         
-        # Search vector store
-        search_results = self.vector_store.search(
+        return None
+    
+    def _retrieve_schemes(self, user_query: str, query_embedding: np.ndarray,
+                          query_filters: Dict[str, Any], max_schemes: int) -> List[Dict[str, Any]]:
+        """Search the vector store and rank the hits"""
+        row_ids, scores = self.vector_store.search_ids(
             query_embedding=query_embedding,
             k=max_schemes,
             filters=query_filters if query_filters else None
         )
         
-        # Rank schemes by relevance
-        relevant_schemes = self._rank_schemes_by_relevance(search_results, user_query)
-        
-        # Generate response
-        response = self._generate_response(user_query, relevant_schemes)
+        return self._rank_schemes_by_relevance(row_ids, scores, user_query, top_k=max_schemes)
+    
+    def _finish_query(self, user_query: str, response: str, relevant_schemes: List[Dict[str, Any]],
+                      query_filters: Dict[str, Any], start_time: float, cache_key: str,
+                      query_embedding: np.ndarray, cache_namespace: Tuple) -> QueryResult:
+        """Score, assemble and cache the final result"""
         
         # Calculate confidence score
         confidence_score = 0.0
@@ -299,12 +695,93 @@ class GovernmentSchemeRAG:
         )
         
         # Cache result
-        self.query_cache[cache_key] = (result, time.time())
+        self._set_cached_query(cache_key, result)
+        if self.openai_enabled:
+            self.semantic_cache.put(query_embedding, result, namespace=cache_namespace)
         
         logger.info(f"Query processed in {processing_time:.2f}s, found {len(relevant_schemes)} schemes")
         
         return result
     
+    def _query_stream(self, user_query: str, max_schemes: int,
+                      additional_filters: Optional[Dict[str, Any]]) -> Iterator[Tuple[str, Optional[QueryResult]]]:
+        """Run retrieval, then stream the generated response and finish with the QueryResult"""
+        
+        start_time = time.time()
+        cache_key = self._query_cache_key(user_query, max_schemes, additional_filters)
+        
+        # Check cache
+        result = self._get_cached_query(cache_key)
+        if result is not None:
+            logger.info("Returning cached result")
+        else:
+            query_embedding = self._get_query_embedding(user_query)
+            query_filters = self._query_filters(user_query, additional_filters)
+            cache_namespace = self._semantic_namespace(max_schemes, query_filters)
+            result = self._precomputed_result(user_query, query_embedding, cache_namespace, start_time)
+        
+        if result is not None:
+            yield result.response, None
+            yield "", result
+            return
+        
+        relevant_schemes = self._retrieve_schemes(user_query, query_embedding, query_filters, max_schemes)
+        
+        # Generate response, passing tokens through as they arrive
+        response_parts = []
+        for delta in self._generate_response(user_query, relevant_schemes):
+            response_parts.append(delta)
+            yield delta, None
+        
+        yield "", self._finish_query(user_query, "".join(response_parts), relevant_schemes, query_filters,
+                                     start_time, cache_key, query_embedding, cache_namespace)
+    
+    async def _aquery_stream(self, user_query: str, max_schemes: int,
+                             additional_filters: Optional[Dict[str, Any]]) -> AsyncIterator[Tuple[str, Optional[QueryResult]]]:
+        """Async _query_stream: filter extraction overlaps the embedding round-trip"""
+        
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        cache_key = self._query_cache_key(user_query, max_schemes, additional_filters)
+        
+        # Check cache
+        result = await loop.run_in_executor(None, self._get_cached_query, cache_key)
+        if result is not None:
+            logger.info("Returning cached result")
+        else:
+            # run_in_executor starts the embedding immediately, so the filters
+            # are extracted while the embedding request is in flight
+            embedding_future = loop.run_in_executor(None, self._get_query_embedding, user_query)
+            query_filters = self._query_filters(user_query, additional_filters)
+            query_embedding = await embedding_future
+            cache_namespace = self._semantic_namespace(max_schemes, query_filters)
+            result = self._precomputed_result(user_query, query_embedding, cache_namespace, start_time)
+        
+        if result is not None:
+            yield result.response, None
+            yield "", result
+            return
+        
+        relevant_schemes = await loop.run_in_executor(
+            None, self._retrieve_schemes, user_query, query_embedding, query_filters, max_schemes
+        )
+        
+        response_parts = []
+        async for delta in self._agenerate_response(user_query, relevant_schemes):
+            response_parts.append(delta)
+            yield delta, None
+        
+        result = await loop.run_in_executor(
+            None, self._finish_query, user_query, "".join(response_parts), relevant_schemes,
+            query_filters, start_time, cache_key, query_embedding, cache_namespace
+        )
+        yield "", result
+    
+    def save_semantic_cache(self) -> None:
+        """Persist the semantic cache so the next startup is warm"""
+        if self.semantic_cache_path:
+            self.semantic_cache.save(str(self.semantic_cache_path))
+    
     def get_scheme_by_id(self, scheme_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific scheme"""
         doc = self.vector_store.get_document_by_id(scheme_id)
@@ -330,6 +807,7 @@ class GovernmentSchemeRAG:
             'embedding_model': self.embedding_model,
             'chat_model': self.chat_model,
             'cache_size': len(self.query_cache),
+            'semantic_cache_size': len(self.semantic_cache),
             'available_categories': self.vector_store.get_all_metadata_values('category'),
             'available_states': self.vector_store.get_all_metadata_values('state_name')
         }
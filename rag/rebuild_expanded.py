@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
-import shutil
 import os
-import requests
 import time
+from _io_helpers import local_api_session, clone_file, swap_in
+
+_SESSION = local_api_session()
 
 def rebuild_with_expanded():
     """Rebuild vector store with expanded dataset"""
@@ -20,15 +21,15 @@ def rebuild_with_expanded():
         # Backup original if not already backed up
         if not os.path.exists(backup_path):
             print("📁 Backing up original dataset...")
-            shutil.copy2(original_path, backup_path)
+            clone_file(original_path, backup_path)
         
         # Replace with expanded dataset
         print("🔄 Switching to expanded dataset...")
-        shutil.copy2(expanded_path, original_path)
+        swap_in(expanded_path, original_path)
         
         # Rebuild vector store
         print("🚀 Rebuilding vector store (this may take a few minutes)...")
-        response = requests.post("http://localhost:8000/setup", timeout=300)
+        response = _SESSION.post("http://localhost:8000/setup", timeout=300)
         
         if response.status_code == 200:
             print("✅ Vector store rebuilt successfully!")
@@ -37,7 +38,7 @@ def rebuild_with_expanded():
             print("\n🧪 Testing business query...")
             time.sleep(2)
             
-            test_response = requests.post(
+            test_response = _SESSION.post(
                 "http://localhost:8000/query",
                 json={"query": "MSME schemes for small business entrepreneurs", "max_results": 5},
                 timeout=15
@@ -79,7 +80,7 @@ def rebuild_with_expanded():
         # Restore original dataset
         print("\n🔄 Restoring original dataset...")
         if os.path.exists(backup_path):
-            shutil.copy2(backup_path, original_path)
+            os.replace(backup_path, original_path)
             print("✅ Original dataset restored")
 
 if __name__ == "__main__":
@@ -31,14 +31,17 @@ def install_packages():
         "rich"
     ]
     
-    for package in packages:
-        try:
-            console.print(f"Installing {package}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            console.print(f"✅ {package} installed successfully")
-        except subprocess.CalledProcessError as e:
-            console.print(f"❌ Failed to install {package}: {e}")
-            return False
+    # One pip run so the resolver and index fetches are shared by all packages
+    try:
+        console.print(f"Installing {', '.join(packages)}...")
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install",
+            "--no-input", "--disable-pip-version-check", "--prefer-binary",
+            *packages
+        ])
+    except subprocess.CalledProcessError as e:
+        console.print(f"❌ Failed to install packages: {e}")
+        return False
     
     console.print("[bold green]✅ All packages installed successfully![/bold green]")
     return True
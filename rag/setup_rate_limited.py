@@ -2,7 +2,11 @@
 
 import requests
 import json
+import os
 import time
+from _io_helpers import local_api_session, clone_file, swap_in
+
+_SESSION = local_api_session()
 
 def try_small_setup():
     """Try to setup with the server running, using a modified approach"""
@@ -10,9 +14,6 @@ def try_small_setup():
     print("🔧 Trying alternative setup approach...")
     
     # First, let's temporarily replace the dataset file
-    import os
-    import shutil
-    
     # Backup original dataset
     original_path = "../data/raw/mega_3000_state_schemes_20250727_150540.json"
     backup_path = "../data/raw/mega_3000_state_schemes_20250727_150540.json.backup"
@@ -21,19 +22,19 @@ def try_small_setup():
     try:
         print("📁 Backing up original dataset...")
         if os.path.exists(original_path) and not os.path.exists(backup_path):
-            shutil.copy2(original_path, backup_path)
+            clone_file(original_path, backup_path)
             print("✅ Backup created")
         
         print("🔄 Replacing with test dataset...")
         if os.path.exists(test_path):
-            shutil.copy2(test_path, original_path)
+            swap_in(test_path, original_path)
             print("✅ Test dataset in place")
         else:
             print("❌ Test dataset not found")
             return False
         
         print("🚀 Attempting setup with small dataset...")
-        response = requests.post("http://localhost:8000/setup", timeout=60)
+        response = _SESSION.post("http://localhost:8000/setup", timeout=60)
         
         if response.status_code == 200:
             result = response.json()
@@ -44,7 +45,7 @@ def try_small_setup():
             print("\n🧪 Testing education query...")
             time.sleep(2)
             
-            test_response = requests.post(
+            test_response = _SESSION.post(
                 "http://localhost:8000/query",
                 json={"query": "education schemes", "max_results": 3},
                 timeout=15
@@ -93,13 +94,13 @@ def try_small_setup():
         # Restore original dataset
         print("\n🔄 Restoring original dataset...")
         if os.path.exists(backup_path):
-            shutil.copy2(backup_path, original_path)
+            os.replace(backup_path, original_path)
             print("✅ Original dataset restored")
 
 def check_server_status():
     """Check if server is running"""
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = _SESSION.get("http://localhost:8000/health", timeout=5)
         return response.status_code == 200
     except:
         return False
@@ -4,17 +4,74 @@ Test script for Gemini-based RAG system
 Tests basic functionality without requiring API keys
 """
 
+import io
 import os
+import re
 import sys
+import shutil
+import threading
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
 # Add the current directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from rich.console import Console
-from rich.panel import Panel
+# Report output is buffered and written to stdout once when main() finishes
+_output = io.StringIO()
+_local = threading.local()
 
-console = Console()
+class _TestOutput(io.TextIOBase):
+    """Writes to the running test's own buffer, or to the report outside a test"""
+    def write(self, text):
+        return getattr(_local, 'buffer', _output).write(text)
+
+_stream = _TestOutput()
+
+# Rich is only worth importing when a terminal will render it
+if sys.stdout.isatty():
+    from rich.console import Console
+    from rich.panel import Panel
+    console = Console(file=_stream, force_terminal=True, width=shutil.get_terminal_size().columns)
+else:
+    _MARKUP_RE = re.compile(r'\[/?[a-z ]+\]')
+    
+    class Panel:
+        """Plain-text stand-in for rich.panel.Panel"""
+        def __init__(self, renderable, **kwargs):
+            self.renderable = renderable
+        
+        @classmethod
+        def fit(cls, renderable, **kwargs):
+            return cls(renderable)
+        
+        def __str__(self):
+            return str(self.renderable)
+    
+    class _PlainConsole:
+        """Plain-text stand-in for rich.console.Console that drops markup tags"""
+        def print(self, *objects, **kwargs):
+            print(*(_MARKUP_RE.sub('', str(obj)) for obj in objects), file=_stream)
+    
+    console = _PlainConsole()
+_console_lock = threading.Lock()
+
+@lru_cache(maxsize=2)
+def _cached_load(path: str) -> tuple:
+    """Schemes from a dataset file, parsed once per process"""
+    from langchain_rag import load_schemes_dataset
+    return tuple(load_schemes_dataset(path))
+
+# Offline RAG system shared by the tests so it is only constructed once
+_RAG_SINGLETON = None
+
+def _get_rag():
+    global _RAG_SINGLETON
+    if _RAG_SINGLETON is None:
+        from langchain_rag import SchemeRAGSystem
+        _RAG_SINGLETON = SchemeRAGSystem(google_api_key=None)
+    return _RAG_SINGLETON
 
 def test_imports():
     """Test that all required imports work"""
@@ -41,32 +98,37 @@ def test_rag_system_init():
     console.print("[blue]Testing RAG system initialization...[/blue]")
     
     try:
-        from langchain_rag import SchemeRAGSystem
-        
         # Test initialization without API key
-        rag_system = SchemeRAGSystem(google_api_key=None)
+        rag_system = _get_rag()
         
         if not rag_system.gemini_enabled:
             console.print("✅ RAG system correctly detects missing API key")
         else:
             console.print("⚠️ RAG system found API key in environment")
         
-        # Test initialization with environment API key
-        rag_system_env = SchemeRAGSystem()
+        stats = rag_system.get_stats()
+        
+        # Test initialization with an environment API key on the same instance,
+        # then restore its keyless state for the tests that share it
+        keyless_state = (rag_system.google_api_key, rag_system.embeddings,
+                         rag_system.llm, rag_system.gemini_enabled)
+        with mock.patch.dict(os.environ, {"GOOGLE_API_KEY": "dummy"}):
+            env_key_enabled = rag_system.enable_gemini()
+        (rag_system.google_api_key, rag_system.embeddings,
+         rag_system.llm, rag_system.gemini_enabled) = keyless_state
         
-        if rag_system_env.gemini_enabled:
+        if env_key_enabled:
             console.print("✅ RAG system successfully initialized with API key")
         else:
             console.print("❌ RAG system failed to initialize with API key")
             return False
         
-        stats = rag_system.get_stats()
-        expected_keys = ["gemini_enabled", "vector_store_ready", "qa_chain_ready", "embedding_model", "llm_model"]
+        expected_keys = {"gemini_enabled", "vector_store_ready", "qa_chain_ready", "embedding_model", "llm_model"}
         
-        for key in expected_keys:
-            if key not in stats:
-                console.print(f"❌ Missing key in stats: {key}")
-                return False
+        missing = expected_keys - stats.keys()
+        if missing:
+            console.print(f"❌ Missing keys in stats: {', '.join(sorted(missing))}")
+            return False
         
         console.print("✅ RAG system stats structure correct")
         return True
@@ -80,8 +142,6 @@ def test_dataset_loading():
     console.print("[blue]Testing dataset loading...[/blue]")
     
     try:
-        from langchain_rag import load_schemes_dataset
-        
         dataset_path = "../data/raw/mega_3000_state_schemes_20250727_150540.json"
         
         if not Path(dataset_path).exists():
@@ -89,17 +149,16 @@ def test_dataset_loading():
             console.print("This is expected if the dataset hasn't been generated yet")
             return True
         
-        schemes = load_schemes_dataset(dataset_path)
+        schemes = _cached_load(dataset_path)
         
         if len(schemes) > 0:
             console.print(f"✅ Successfully loaded {len(schemes)} schemes")
             
             # Test document creation
-            from langchain_rag import SchemeRAGSystem
-            rag_system = SchemeRAGSystem(google_api_key=None)
+            rag_system = _get_rag()
             
             # Take just first 5 schemes for testing
-            test_schemes = schemes[:5]
+            test_schemes = list(schemes[:5])
             documents = rag_system.create_documents_from_schemes(test_schemes)
             
             if len(documents) == len(test_schemes):
@@ -144,30 +203,73 @@ def test_api_server():
         console.print(f"❌ API server test failed: {e}")
         return False
 
+def _run_test(test_name, test_func) -> bool:
+    """Run one test and report its outcome as a single block of output"""
+    _local.buffer = io.StringIO()
+    try:
+        console.print(f"\n[bold yellow]Running: {test_name}[/bold yellow]")
+        
+        try:
+            passed = bool(test_func())
+        except Exception as e:
+            console.print(f"[red]❌ {test_name} ERROR: {e}[/red]")
+            return False
+        
+        if passed:
+            console.print(f"[green]✅ {test_name} PASSED[/green]")
+        else:
+            console.print(f"[red]❌ {test_name} FAILED[/red]")
+        return passed
+    finally:
+        buffer = _local.buffer
+        del _local.buffer
+        with _console_lock:
+            _output.write(buffer.getvalue())
+
+def _preload_modules() -> bool:
+    """Import the RAG and API server modules once on the calling thread"""
+    try:
+        import langchain_rag
+        import langchain_api_server
+    except Exception:
+        return False
+    return True
+
 def main():
     """Run all tests"""
+    try:
+        _run_all()
+    finally:
+        sys.stdout.write(_output.getvalue())
+        sys.stdout.flush()
+
+def _run_all():
     console.print(Panel.fit("🧪 Testing Gemini RAG System", style="bold blue"))
     
-    tests = [
+    # Import and API-server checks are independent; the other two share the
+    # RAG singleton, so they run in order on this thread alongside them
+    independent = [
         ("Import Tests", test_imports),
+        ("API Server Configuration", test_api_server),
+    ]
+    sequential = [
         ("RAG System Initialization", test_rag_system_init),
         ("Dataset Loading", test_dataset_loading),
-        ("API Server Configuration", test_api_server),
     ]
     
-    passed = 0
-    total = len(tests)
+    total = len(independent) + len(sequential)
     
-    for test_name, test_func in tests:
-        console.print(f"\n[bold yellow]Running: {test_name}[/bold yellow]")
-        try:
-            if test_func():
-                passed += 1
-                console.print(f"[green]✅ {test_name} PASSED[/green]")
-            else:
-                console.print(f"[red]❌ {test_name} FAILED[/red]")
-        except Exception as e:
-            console.print(f"[red]❌ {test_name} ERROR: {e}[/red]")
+    # Concurrent first imports can see partially initialized modules, so the
+    # heavy modules are imported here first. If that fails, every test runs
+    # in order and reports the import error itself
+    if not _preload_modules():
+        sequential = independent + sequential
+        independent = []
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(independent))) as executor:
+        futures = [executor.submit(_run_test, test_name, test_func) for test_name, test_func in independent]
+        passed = sum(_run_test(test_name, test_func) for test_name, test_func in sequential)
+        passed += sum(future.result() for future in as_completed(futures))
     
     console.print(f"\n[bold]Results: {passed}/{total} tests passed[/bold]")
     
@@ -4,8 +4,20 @@ Simple test script to check RAG system functionality
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from _io_helpers import json_loads as _loads
+
+def _json(response):
+    """Decode a JSON response body straight from its bytes"""
+    return _loads(response.content)
+
+# One pooled keep-alive session for every request to the server
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=1))
 
 def test_rag_system():
     base_url = "http://localhost:8000"
@@ -13,13 +25,29 @@ def test_rag_system():
     print("🧪 Testing RAG System...")
     print("=" * 50)
     
+    query_data = {
+        "query": "agriculture schemes in Tamil Nadu",
+        "include_sources": True
+    }
+    search_data = {
+        "query": "employment schemes",
+        "state": "Tamil Nadu",
+        "category": "Employment"
+    }
+    
+    # Health and stats are independent, so fetch them together; both have
+    # finished when the block exits, so nothing is left running on return
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        health_future = executor.submit(SESSION.get, f"{base_url}/health")
+        stats_future = executor.submit(SESSION.get, f"{base_url}/stats")
+    
     # Test 1: Health Check
     print("\n1. Health Check:")
     try:
-        response = requests.get(f"{base_url}/health")
+        response = health_future.result()
         if response.status_code == 200:
             print("✅ Server is healthy")
-            print(json.dumps(response.json(), indent=2))
+            print(json.dumps(_json(response), indent=2))
         else:
             print(f"❌ Health check failed: {response.status_code}")
             return False
@@ -30,9 +58,9 @@ def test_rag_system():
     # Test 2: System Stats
     print("\n2. System Statistics:")
     try:
-        response = requests.get(f"{base_url}/stats")
+        response = stats_future.result()
         if response.status_code == 200:
-            stats = response.json()
+            stats = _json(response)
             print("✅ System stats retrieved")
             print(f"   Gemini Enabled: {stats.get('gemini_enabled')}")
             print(f"   Vector Store Ready: {stats.get('vector_store_ready')}")
@@ -46,21 +74,28 @@ def test_rag_system():
     except Exception as e:
         print(f"❌ Cannot get stats: {e}")
     
-    # Test 3: Simple Query
-    print("\n3. Test Query:")
-    try:
-        query_data = {
-            "query": "agriculture schemes in Tamil Nadu",
-            "include_sources": True
-        }
-        response = requests.post(
+    # The Gemini-backed query and search only go out once health has passed
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        query_future = executor.submit(
+            SESSION.post,
             f"{base_url}/query",
             json=query_data,
             headers={"Content-Type": "application/json"}
         )
+        search_future = executor.submit(
+            SESSION.post,
+            f"{base_url}/search",
+            json=search_data,
+            headers={"Content-Type": "application/json"}
+        )
+    
+    # Test 3: Simple Query
+    print("\n3. Test Query:")
+    try:
+        response = query_future.result()
         
         if response.status_code == 200:
-            result = response.json()
+            result = _json(response)
             print("✅ Query successful!")
             print(f"   Answer: {result.get('answer', 'No answer')[:200]}...")
             print(f"   Total Sources: {result.get('total_sources', 0)}")
@@ -75,19 +110,10 @@ def test_rag_system():
     # Test 4: Filtered Search
     print("\n4. Test Filtered Search:")
     try:
-        search_data = {
-            "query": "employment schemes",
-            "state": "Tamil Nadu",
-            "category": "Employment"
-        }
-        response = requests.post(
-            f"{base_url}/search",
-            json=search_data,
-            headers={"Content-Type": "application/json"}
-        )
+        response = search_future.result()
         
         if response.status_code == 200:
-            result = response.json()
+            result = _json(response)
             print("✅ Filtered search successful!")
             print(f"   Total Found: {result.get('total_found', 0)}")
             if result.get('results'):
@@ -97,6 +123,31 @@ def test_rag_system():
     except Exception as e:
         print(f"❌ Filtered search error: {e}")
     
+    # Test 5: Batch Query
+    print("\n5. Test Batch Query:")
+    try:
+        batch_data = {
+            "queries": [
+                {"query": "education scholarships for students", "include_sources": True},
+                {"query": "health insurance schemes", "include_sources": True}
+            ]
+        }
+        response = SESSION.post(
+            f"{base_url}/query/batch",
+            json=batch_data,
+            headers={"Content-Type": "application/json"}
+        )
+        
+        if response.status_code == 200:
+            results = _json(response).get('results', [])
+            print(f"✅ Batch query successful! {len(results)} answers in one request")
+            for query, result in zip(batch_data["queries"], results):
+                print(f"   '{query['query']}' → {result.get('total_sources', 0)} sources")
+        else:
+            print(f"❌ Batch query failed: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Batch query error: {e}")
+    
     print("\n" + "=" * 50)
     print("🎉 RAG System Test Complete!")
     return True
@@ -1,9 +1,115 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import time
+import asyncio
+import hashlib
+import tempfile
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import sqlite3
+from pathlib import Path
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+from _io_helpers import json_loads as _loads
+
+def _json(response):
+    """Decode a JSON response body straight from its bytes"""
+    return _loads(response.content)
+
+# One pooled keep-alive session for every request to the server
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=1))
+
+def _cache_path(url):
+    return Path(tempfile.gettempdir()) / f"schemesaathi_{hashlib.md5(url.encode()).hexdigest()}.json"
+
+def _read_cached(url, ttl, force):
+    path = _cache_path(url)
+    if not force and ttl > 0 and path.exists() and time.time() - path.stat().st_mtime < ttl:
+        return _loads(path.read_bytes())
+    return None
+
+def _cached_get(url, ttl=60, force=False):
+    """GET a JSON endpoint, reusing a successful response cached on disk for ttl seconds
+    
+    ttl=0 always asks the server. Returns (status_code, data); data is None for
+    non-200 responses, which are not cached.
+    """
+    data = _read_cached(url, ttl, force)
+    if data is not None:
+        return 200, data
+    
+    response = SESSION.get(url, timeout=5)
+    if response.status_code != 200:
+        return response.status_code, None
+    
+    if ttl > 0:
+        _cache_path(url).write_bytes(response.content)
+    return 200, _json(response)
+
+async def _probe(urls, ttls, force=False):
+    """Fetch several cheap JSON endpoints concurrently, with the same disk cache as _cached_get"""
+    ttl_by_url = dict(zip(urls, ttls))
+    results = {url: (200, data) for url in urls
+               if (data := _read_cached(url, ttl_by_url[url], force)) is not None}
+    missing = [url for url in urls if url not in results]
+    if missing:
+        async with httpx.AsyncClient(timeout=5) as client:
+            responses = await asyncio.gather(*(client.get(url) for url in missing))
+        for url, response in zip(missing, responses):
+            if response.status_code != 200:
+                results[url] = (response.status_code, None)
+                continue
+            if ttl_by_url[url] > 0:
+                _cache_path(url).write_bytes(response.content)
+            results[url] = (200, _json(response))
+    return [results[url] for url in urls]
+
+# Successful /query responses, keyed by url and payload, so that reruns within
+# QUERY_CACHE_TTL seconds do not spend Gemini quota on the same test query.
+# Opened on first use by _response_cache()
+_RESPONSE_CACHE = None
+QUERY_CACHE_TTL = 600
+
+def _response_cache():
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        _RESPONSE_CACHE = sqlite3.connect(str(Path(tempfile.gettempdir()) / "schemesaathi_cache.sqlite"))
+        _RESPONSE_CACHE.execute(
+            "CREATE TABLE IF NOT EXISTS responses (h TEXT PRIMARY KEY, resp BLOB NOT NULL, ts REAL NOT NULL)"
+        )
+    return _RESPONSE_CACHE
+
+def _cached_post(url, payload, timeout=15, ttl=QUERY_CACHE_TTL, force=False):
+    """POST JSON, reusing a successful response stored less than ttl seconds ago
+    
+    Returns (status_code, data, cached); data is None for non-200 responses, which are not cached.
+    """
+    cache = _response_cache()
+    key = hashlib.sha256(json.dumps([url, payload], sort_keys=True).encode()).hexdigest()
+    if not force:
+        row = cache.execute(
+            "SELECT resp FROM responses WHERE h = ? AND ts > ?", (key, time.time() - ttl)
+        ).fetchone()
+        if row:
+            return 200, _loads(row[0]), True
+    
+    response = SESSION.post(url, json=payload, timeout=timeout)
+    if response.status_code != 200:
+        return response.status_code, None, False
+    
+    cache.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, response.content, time.time()))
+    cache.commit()
+    return 200, _json(response), False
 
 def check_api_key():
     """Check if API key is set and test it with a simple call"""
@@ -17,29 +123,39 @@ def check_api_key():
     print("✅ API key found in environment")
     return True
 
-def test_server_minimal():
-    """Test server with minimal API calls due to rate limits"""
+def test_server_minimal(refresh=False):
+    """Test server with minimal API calls due to rate limits
+    
+    /health is always asked live. Unless refresh is set, the /stats response is
+    reused for 60 s and the /query response for QUERY_CACHE_TTL seconds.
+    """
     
     print("🧪 Testing server with rate limit considerations...")
     print()
     
     try:
+        # /health and /stats never touch Gemini, so fetch them together without
+        # pauses; health is never cached, since it must reflect the live server
+        urls = ["http://localhost:8000/health", "http://localhost:8000/stats"]
+        ttls = [0, 60]
+        if HTTPX_AVAILABLE:
+            health, stats_result = asyncio.run(_probe(urls, ttls, force=refresh))
+        else:
+            health, stats_result = (_cached_get(url, ttl, force=refresh) for url, ttl in zip(urls, ttls))
+        
         # 1. Check health (no API calls)
         print("1. Checking server health...")
-        response = requests.get("http://localhost:8000/health", timeout=5)
-        if response.status_code == 200:
+        status_code, _ = health
+        if status_code == 200:
             print("✅ Server is healthy")
         else:
-            print(f"❌ Server health check failed: {response.status_code}")
+            print(f"❌ Server health check failed: {status_code}")
             return False
-            
-        time.sleep(1)  # Rate limit protection
         
         # 2. Check stats (no API calls)
         print("2. Checking vector store stats...")
-        response = requests.get("http://localhost:8000/stats", timeout=5)
-        if response.status_code == 200:
-            stats = response.json()
+        status_code, stats = stats_result
+        if status_code == 200:
             print(f"✅ Vector store ready: {stats.get('vector_store_ready', False)}")
             print(f"📊 Documents: {stats.get('total_documents', 0)}")
             
@@ -48,23 +164,25 @@ def test_server_minimal():
                 print("💡 You may need to run setup, but this will use many API calls")
                 return False
         else:
-            print(f"❌ Stats check failed: {response.status_code}")
+            print(f"❌ Stats check failed: {status_code}")
             return False
             
-        time.sleep(2)  # Rate limit protection
+        time.sleep(2)  # Rate limit protection before the Gemini-backed query
         
         # 3. Test ONE simple query
         print("3. Testing one education query (uses API calls)...")
         print("⏳ This will use your API quota...")
         
-        response = requests.post(
+        status_code, data, cached = _cached_post(
             "http://localhost:8000/query",
-            json={"query": "education", "max_results": 2},
-            timeout=15
+            {"query": "education", "max_results": 2},
+            timeout=15,
+            force=refresh
         )
         
-        if response.status_code == 200:
-            data = response.json()
+        if status_code == 200:
+            if cached:
+                print("💾 Using cached response (no API quota used; pass --refresh to re-query)")
             sources = data.get('sources', [])
             
             print(f"✅ Query successful, got {len(sources)} results")
@@ -88,8 +206,8 @@ def test_server_minimal():
                 print("\n💡 Vector store may need rebuilding (will use lots of API calls)")
                 
         else:
-            print(f"❌ Query failed: {response.status_code}")
-            if response.status_code == 429:
+            print(f"❌ Query failed: {status_code}")
+            if status_code == 429:
                 print("🚫 Rate limit hit!")
             return False
             
@@ -142,7 +260,7 @@ if __name__ == "__main__":
         print("\n💡 Please add your API key to .env file first")
         exit(1)
     
-    success = test_server_minimal()
+    success = test_server_minimal(refresh="--refresh" in sys.argv)
     rate_limit_advice()
     
     if success:
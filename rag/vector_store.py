@@ -4,17 +4,120 @@ Handles vector embeddings storage and retrieval using FAISS
 """
 
 import numpy as np
+import os
 import json
 import pickle
 import faiss
 from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
 import logging
+from collections import defaultdict
+from datetime import date
 from dataclasses import dataclass
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    pq = None
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+    simsimd = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Metadata fields with a value -> row id index, used to pre-filter searches
+INDEXED_METADATA_FIELDS = ('category', 'state_name', 'implementing_ministry')
+
+# Scheme metadata kept as parallel per-row columns for result formatting
+SCHEME_COLUMNS = ('scheme_id', 'scheme_name', 'category', 'state_name', 'implementing_ministry')
+
+# Scalar quantizer types for stored vectors; queries stay float32
+QUANTIZATION_TYPES = {
+    'fp16': faiss.ScalarQuantizer.QT_fp16,
+    'sq8': faiss.ScalarQuantizer.QT_8bit,
+}
+
+# index_factory codes for storing Flat vectors at each precision; the
+# quantized ones are trained on the first add_documents batch
+PRECISION_CODES = {
+    'fp32': 'Flat',
+    'fp16': 'SQfp16',
+    'sq8': 'SQ8',
+}
+
+# 8-bit flat corpora up to this size are scanned with SimSIMD over an int8 copy
+# of the vectors, where a single kernel call beats FAISS's per-search overhead
+SIMSIMD_MAX_VECTORS = 20000
+
+# Rows preselected by the int8 kernel per requested result, rescored in float32
+SIMSIMD_SHORTLIST_FACTOR = 4
+
+# Smallest shard worth a thread of its own when splitting a flat index
+SHARD_MIN_VECTORS = 10000
+
+# Single-document adds are staged and sent to FAISS in blocks of this many rows
+ADD_BATCH_SIZE = 512
+
+# Product quantization: one 8-bit code per this many dimensions (48 codes at 1536-D),
+# enabled once there are enough vectors to train 256 centroids per sub-quantizer
+PQ_DIMS_PER_CODE = 32
+PQ_MIN_VECTORS = 256 * 39
+
+def default_index_factory(num_vectors: int, embedding_dim: int = 1536) -> str:
+    """Pick a FAISS index layout for a corpus of the given size
+    
+    IVF needs roughly 39 training points per list, so small corpora keep
+    exact flat search, mid-sized ones use IVF with 8-bit scalar quantization
+    and large ones use IVF-PQ codes of embedding_dim / 32 bytes per vector.
+    """
+    nlist = min(1024, num_vectors // 39)
+    if nlist < 64:
+        return "Flat"
+    pq_codes = embedding_dim // PQ_DIMS_PER_CODE
+    if num_vectors >= PQ_MIN_VECTORS and pq_codes and embedding_dim % pq_codes == 0:
+        return f"IVF{nlist},PQ{pq_codes}x8"
+    return f"IVF{nlist},SQ8"
+
+def _to_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scale each row to the int8 range, returning the codes and per-row dequantization scales"""
+    scale = np.abs(vectors).max(axis=1, keepdims=True)
+    scale[scale == 0] = 1.0
+    codes = np.rint(vectors * (127.0 / scale)).astype(np.int8)
+    return codes, (scale.ravel() / 127.0).astype(np.float32)
+
+def _intern_key(value: Any) -> Any:
+    """Dict key for a metadata value; unhashable ones (lists, dicts) key on their repr"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return (type(value).__name__, repr(value))
+
+def _json_default(value: Any) -> Any:
+    """JSON encoding for the extra metadata values json cannot handle natively"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot store metadata value of type {type(value).__name__} in Parquet")
+
+def normalize_embedding(embedding: np.ndarray) -> np.ndarray:
+    """Unit-length float32 copy of an embedding, reusable across searches"""
+    embedding = np.array(embedding, dtype=np.float32).reshape(1, -1)
+    faiss.normalize_L2(embedding)
+    return embedding.ravel()
+
 @dataclass
 class SchemeDocument:
     """Represents a government scheme document for vector storage"""
@@ -26,15 +129,27 @@ class SchemeDocument:
 class VectorStore:
     """FAISS-based vector store for government schemes"""
     
-    def __init__(self, embedding_dim: int = 1536, index_path: str = "data/index"):
+    def __init__(self, embedding_dim: int = 1536, index_path: str = "data/index",
+                 index_factory: str = "Flat", nprobe: int = 16, precision: str = "fp32"):
+        """precision sets how a Flat index (or the Flat codes of an IVF index) store
+        vectors: fp32, fp16 or sq8. On normalized embeddings fp16 shifts scores by
+        about 1e-3 at half the memory traffic; queries always stay float32.
+        """
         self.embedding_dim = embedding_dim
         self.index_path = Path(index_path)
         self.index_path.mkdir(parents=True, exist_ok=True)
+        self.nprobe = nprobe
         
-        # Initialize FAISS index
-        self.index = faiss.IndexFlatIP(embedding_dim)  # Inner product for cosine similarity
-        self.documents: List[SchemeDocument] = []
-        self.id_to_doc: Dict[str, SchemeDocument] = {}
+        if precision not in PRECISION_CODES:
+            raise ValueError(f"Unknown precision '{precision}', expected fp32, fp16 or sq8")
+        if index_factory.endswith("Flat"):
+            index_factory = index_factory[:-len("Flat")] + PRECISION_CODES[precision]
+        
+        # Initialize FAISS index (inner product on normalized vectors = cosine similarity)
+        self.index = faiss.index_factory(embedding_dim, index_factory, faiss.METRIC_INNER_PRODUCT)
+        self.is_ivf = self._is_ivf()
+        self._reset_shards()
+        self._reset_documents()
         
         logger.info(f"Initialized VectorStore with embedding dimension: {embedding_dim}")
     
@@ -42,108 +157,460 @@ class VectorStore:
         """Add a single document to the vector store"""
         if doc.embedding is None:
             raise ValueError("Document must have an embedding")
+        if not self.index.is_trained:
+            raise ValueError("Index must be trained by add_documents before adding single documents")
+        if self._shards is not None:
+            raise ValueError("Cannot add documents to a sharded index")
         
-        # Normalize embedding for cosine similarity
-        embedding = doc.embedding.astype('float32')
-        embedding = embedding / np.linalg.norm(embedding)
-        
-        # Add to FAISS index
-        self.index.add(embedding.reshape(1, -1))
+        # Stage the normalized embedding; rows reach FAISS in blocks via flush()
+        row = self._pending[self._n_pending:self._n_pending + 1]
+        row[0] = doc.embedding
+        faiss.normalize_L2(row)
+        self._n_pending += 1
         
         # Store document
-        self.documents.append(doc)
-        self.id_to_doc[doc.id] = doc
+        self._register_document(doc)
+        if self._n_pending == ADD_BATCH_SIZE:
+            self.flush()
         
         logger.debug(f"Added document {doc.id} to vector store")
     
-    def add_documents(self, docs: List[SchemeDocument]) -> None:
-        """Add multiple documents to the vector store"""
+    def add_documents(self, docs: List[SchemeDocument], embeddings: Optional[np.ndarray] = None) -> None:
+        """Add multiple documents to the vector store
+        
+        embeddings may supply all vectors as one (len(docs), dim) matrix instead of
+        per-document embeddings; a float32 C-contiguous matrix is normalized in place.
+        """
+        if self._shards is not None:
+            raise ValueError("Cannot add documents to a sharded index")
         logger.info(f"Adding {len(docs)} documents to vector store...")
         
-        # Prepare embeddings
-        embeddings = []
-        for doc in docs:
-            if doc.embedding is None:
-                raise ValueError(f"Document {doc.id} must have an embedding")
-            
-            # Normalize embedding
-            embedding = doc.embedding.astype('float32')
-            embedding = embedding / np.linalg.norm(embedding)
-            embeddings.append(embedding)
+        # Staged rows come first so row ids stay in insertion order
+        self.flush()
+        
+        if embeddings is not None:
+            # Use the caller's matrix directly, copying only if it is not float32 C-contiguous
+            embeddings_matrix = np.require(embeddings, dtype=np.float32, requirements=['C', 'W'])
+            if embeddings_matrix.shape != (len(docs), self.embedding_dim):
+                raise ValueError(f"Expected embeddings of shape {(len(docs), self.embedding_dim)}, got {embeddings_matrix.shape}")
+        else:
+            # Copy embeddings straight into one float32 matrix
+            embeddings_matrix = np.empty((len(docs), self.embedding_dim), dtype=np.float32)
+            for i, doc in enumerate(docs):
+                if doc.embedding is None:
+                    raise ValueError(f"Document {doc.id} must have an embedding")
+                embeddings_matrix[i] = doc.embedding
+        
+        # Normalize all rows in place for cosine similarity
+        faiss.normalize_L2(embeddings_matrix)
         
-        # Batch add to FAISS
-        embeddings_matrix = np.vstack(embeddings)
+        # Batch add to FAISS, training quantizers on the first batch
+        if not self.index.is_trained:
+            logger.info(f"Training index on {len(embeddings_matrix)} vectors...")
+            self.index.train(embeddings_matrix)
         self.index.add(embeddings_matrix)
         
         # Store documents
         for doc in docs:
-            self.documents.append(doc)
-            self.id_to_doc[doc.id] = doc
+            self._register_document(doc)
         
         logger.info(f"Successfully added {len(docs)} documents. Total: {len(self.documents)}")
     
+    def _reset_documents(self) -> None:
+        """Clear all tracked documents"""
+        self.documents: List[SchemeDocument] = []
+        self.id_to_doc: Dict[str, SchemeDocument] = {}
+        # Indexed fields are interned: distinct value -> small int code, plus
+        # one code per row (-1 when the value is missing or not a string)
+        self.metadata_index: Dict[str, Dict[str, int]] = {
+            field: {} for field in INDEXED_METADATA_FIELDS
+        }
+        self._code_lists: Dict[str, List[int]] = {field: [] for field in INDEXED_METADATA_FIELDS}
+        self._code_arrays: Optional[Dict[str, np.ndarray]] = None
+        # Lowercased form of each distinct indexed value, for substring filters
+        self._metadata_lower: Dict[str, Dict[str, str]] = {
+            field: {} for field in INDEXED_METADATA_FIELDS
+        }
+        self._unique_by_field: Dict[str, set] = defaultdict(set)
+        self._dense_i8: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._gpu_index: Optional[faiss.Index] = None
+        self._pending = np.empty((ADD_BATCH_SIZE, self.embedding_dim), dtype=np.float32)
+        self._n_pending = 0
+        # field -> (codes per row, distinct values, lowercased distinct values), for filtering
+        self._filter_columns: Dict[str, Tuple[np.ndarray, List[Any], List[str]]] = {}
+    
+    def _register_document(self, doc: SchemeDocument) -> None:
+        """Track a document that has been added to the FAISS index"""
+        self.documents.append(doc)
+        self.id_to_doc[doc.id] = doc
+        self._dense_i8 = None
+        self._gpu_index = None
+        if self._filter_columns:
+            self._filter_columns = {}
+        
+        for field, codes in self.metadata_index.items():
+            value = doc.metadata.get(field)
+            code = -1
+            if isinstance(value, str):
+                code = codes.get(value, -1)
+                if code < 0:
+                    code = codes[value] = len(codes)
+                    self._metadata_lower[field][value] = value.lower()
+            self._code_lists[field].append(code)
+        self._code_arrays = None
+        
+        for field, value in doc.metadata.items():
+            # List-valued fields contribute their elements; unhashable
+            # values such as nested dicts are not tracked
+            unique = self._unique_by_field[field]
+            for item in (value if isinstance(value, (list, tuple, set, frozenset)) else (value,)):
+                try:
+                    unique.add(item)
+                except TypeError:
+                    pass
+    
+    def flush(self) -> None:
+        """Add embeddings staged by add_document to the FAISS index"""
+        if self._n_pending:
+            self.index.add(self._pending[:self._n_pending])
+            self._n_pending = 0
+    
+    def _reset_shards(self) -> None:
+        # Sub-indexes are kept referenced here since IndexShards does not own them
+        self._shards: Optional[List[faiss.Index]] = None
+        self._shard_bounds: Optional[np.ndarray] = None
+    
+    def shard(self, n_shards: Optional[int] = None) -> None:
+        """Split a flat index into contiguous row ranges searched on parallel threads
+        
+        A flat index scans with one thread per query, so a single query leaves
+        the other cores idle. The sharded index accepts no new documents.
+        """
+        self.flush()
+        n_shards = min(n_shards or os.cpu_count() or 1, self.index.ntotal // SHARD_MIN_VECTORS)
+        if n_shards < 2 or self._shards is not None:
+            return
+        if not isinstance(self.index, faiss.IndexFlat):
+            logger.warning("Skipping sharding: only flat indexes can be sharded")
+            return
+        
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        bounds = np.linspace(0, self.index.ntotal, n_shards + 1).astype(np.int64)
+        sharded = faiss.IndexShards(self.embedding_dim, True, True)
+        shards = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            shard = faiss.IndexFlatIP(self.embedding_dim)
+            shard.add(vectors[start:end])
+            sharded.add_shard(shard)
+            shards.append(shard)
+        
+        self.index = sharded
+        self._shards = shards
+        self._shard_bounds = bounds
+        self._dense_i8 = None
+        self._gpu_index = None
+        
+        logger.info(f"Split index into {n_shards} shards")
+    
+    def _unsharded_index(self) -> faiss.Index:
+        """Index to persist; shards are merged back since IndexShards cannot be written"""
+        if self._shards is None:
+            return self.index
+        merged = faiss.IndexFlatIP(self.embedding_dim)
+        for shard in self._shards:
+            merged.add(shard.reconstruct_n(0, shard.ntotal))
+        return merged
+    
+    def _search_shards(self, query_embedding: np.ndarray, n_search: int,
+                       candidate_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Selector search over shards, translating candidate ids to each shard's local ids"""
+        all_scores, all_ids = [], []
+        for shard, start, end in zip(self._shards, self._shard_bounds[:-1], self._shard_bounds[1:]):
+            local_ids = candidate_ids[(candidate_ids >= start) & (candidate_ids < end)] - start
+            if local_ids.size == 0:
+                continue
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(local_ids))
+            scores, indices = shard.search(query_embedding.reshape(1, -1), min(n_search, local_ids.size), params=params)
+            found = indices[0] >= 0
+            all_scores.append(scores[0][found])
+            all_ids.append(indices[0][found] + start)
+        
+        scores = np.concatenate(all_scores)
+        indices = np.concatenate(all_ids)
+        
+        # Partition out the best n_search before sorting only those
+        top = np.arange(scores.size)
+        if scores.size > n_search:
+            top = np.argpartition(-scores, n_search - 1)[:n_search]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return scores[top].reshape(1, -1), indices[top].reshape(1, -1)
+    
+    def _is_ivf(self) -> bool:
+        try:
+            faiss.extract_index_ivf(self.index)
+            return True
+        except RuntimeError:
+            return False
+    
+    def _dense_matrix(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """int8 copy of the stored vectors and their scales for small 8-bit flat indexes, else None"""
+        # Other precisions keep FAISS's exact scores rather than int8 approximations
+        if (not SIMSIMD_AVAILABLE or self._shards is not None
+                or not isinstance(self.index, faiss.IndexScalarQuantizer)
+                or self.index.sq.qtype != faiss.ScalarQuantizer.QT_8bit
+                or not 0 < self.index.ntotal <= SIMSIMD_MAX_VECTORS):
+            return None
+        if self._dense_i8 is None:
+            # Rebuilt lazily from the index, whose vectors are already normalized
+            self._dense_i8 = _to_int8(self.index.reconstruct_n(0, self.index.ntotal))
+        return self._dense_i8
+    
+    def _dense_search(self, dense: Tuple[np.ndarray, np.ndarray], query_embedding: np.ndarray, n_search: int,
+                      candidate_ids: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-n search over the int8 copy, shaped like faiss Index.search output"""
+        codes, scales = dense
+        if candidate_ids is not None:
+            codes, scales = codes[candidate_ids], scales[candidate_ids]
+        
+        # The int8 kernel only preselects a shortlist; the float32 query then
+        # scores it against the dequantized rows
+        n_short = min(len(codes), SIMSIMD_SHORTLIST_FACTOR * n_search)
+        query_i8, _ = _to_int8(query_embedding.reshape(1, -1))
+        approx = np.asarray(simsimd.cdist(query_i8, codes, metric='dot'), dtype=np.float32).ravel() * scales
+        short = np.argpartition(-approx, n_short - 1)[:n_short]
+        scores = (codes[short].astype(np.float32) @ query_embedding) * scales[short]
+        
+        order = np.argsort(-scores, kind='stable')[:n_search]
+        top = short[order]
+        indices = top if candidate_ids is None else candidate_ids[top]
+        return scores[order].reshape(1, -1), indices.reshape(1, -1)
+    
+    def _row_codes(self, field: str) -> np.ndarray:
+        """Per-row int32 codes of an indexed field"""
+        if self._code_arrays is None:
+            # Rebuilt lazily so bulk inserts do not reallocate arrays per document
+            self._code_arrays = {
+                name: np.array(codes, dtype=np.int32) for name, codes in self._code_lists.items()
+            }
+        return self._code_arrays[field]
+    
+    def _candidate_ids(self, filters: Dict[str, Any]) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """Resolve indexed filters to candidate row ids
+        
+        Returns (ids, remaining_filters); ids is None when no filter could be
+        resolved from the metadata index.
+        """
+        candidates = None
+        remaining = {}
+        
+        for key, value in filters.items():
+            values = self.metadata_index.get(key)
+            if values is None:
+                remaining[key] = value
+                continue
+            
+            # Same semantics as _filter_mask, evaluated over distinct values
+            if isinstance(value, list):
+                matched = [v for v in value if v in values]
+            elif isinstance(value, str):
+                value_lower = value.lower()
+                matched = [v for v, v_lower in self._metadata_lower[key].items() if value_lower in v_lower]
+            else:
+                matched = [value] if value in values else []
+            
+            # One vectorized pass over the field's row codes; ids come out sorted
+            matched_codes = np.array([values[v] for v in matched], dtype=np.int32)
+            ids = np.flatnonzero(np.isin(self._row_codes(key), matched_codes)).astype(np.int64)
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids)
+        
+        return candidates, remaining
+    
+    def search_ids(self, query_embedding: np.ndarray, k: int = 10,
+                   filters: Optional[Dict[str, Any]] = None,
+                   prenormalized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Search for similar documents, returning (row ids, scores) best first
+        
+        With prenormalized=True the query must already come from normalize_embedding().
+        """
+        
+        self.flush()
+        
+        # Normalize query embedding
+        if not prenormalized:
+            query_embedding = normalize_embedding(query_embedding)
+        
+        # Pre-filter indexed metadata inside FAISS instead of over-fetching
+        candidate_ids, filters = self._candidate_ids(filters) if filters else (None, filters)
+        if candidate_ids is not None:
+            if candidate_ids.size == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            selector = faiss.IDSelectorBatch(candidate_ids)
+            n_search = min(k * 2 if filters else k, candidate_ids.size)
+        else:
+            selector = None
+            n_search = min(k * 2, len(self.documents))  # Get more for filtering
+        
+        dense = self._dense_matrix()
+        if dense is not None and n_search > 0:
+            scores, indices = self._dense_search(dense, query_embedding, n_search, candidate_ids)
+        elif selector is not None and self._shards is not None:
+            # IndexShards would apply the selector to each shard's local ids
+            scores, indices = self._search_shards(query_embedding, n_search, candidate_ids)
+        else:
+            if self.is_ivf:
+                params = faiss.SearchParametersIVF(nprobe=self.nprobe)
+            else:
+                params = faiss.SearchParameters() if selector is not None else None
+            if selector is not None:
+                params.sel = selector
+            
+            # Search in FAISS
+            scores, indices = self.index.search(query_embedding.reshape(1, -1), n_search, params=params)
+        
+        # Drop padding (-1) ids, apply remaining filters and keep the best k
+        row_ids, row_scores = indices[0], scores[0]
+        valid = (row_ids >= 0) & (row_ids < len(self.documents))
+        row_ids, row_scores = row_ids[valid], row_scores[valid]
+        if filters:
+            keep = self._filter_mask(row_ids, filters)
+            row_ids, row_scores = row_ids[keep], row_scores[keep]
+        row_ids, row_scores = row_ids[:k], row_scores[:k]
+        
+        logger.debug(f"Search returned {len(row_ids)} results")
+        return row_ids.astype(np.int64, copy=False), row_scores.astype(np.float32, copy=False)
+    
     def search(self, query_embedding: np.ndarray, k: int = 10, 
                filters: Optional[Dict[str, Any]] = None) -> List[Tuple[SchemeDocument, float]]:
         """Search for similar documents"""
+        row_ids, scores = self.search_ids(query_embedding, k, filters)
+        return [(self.documents[idx], float(score)) for idx, score in zip(row_ids, scores)]
+    
+    def search_prenormalized(self, query_unit: np.ndarray, k: int = 10,
+                             filters: Optional[Dict[str, Any]] = None) -> List[Tuple[SchemeDocument, float]]:
+        """Search with a query already normalized by normalize_embedding(), skipping the norm"""
+        if query_unit.dtype != np.float32 or not query_unit.flags.c_contiguous:
+            raise ValueError("Prenormalized query must be a C-contiguous float32 array")
+        row_ids, scores = self.search_ids(query_unit, k, filters, prenormalized=True)
+        return [(self.documents[idx], float(score)) for idx, score in zip(row_ids, scores)]
+    
+    def _batch_search_index(self) -> faiss.Index:
+        """GPU replica of the index when a CUDA device is available, else the index itself"""
+        if getattr(faiss, 'get_num_gpus', lambda: 0)() == 0:
+            return self.index
+        if self._gpu_index is None:
+            # Rebuilt lazily from the unsharded index after documents change
+            self._gpu_index = faiss.index_cpu_to_all_gpus(self._unsharded_index())
+            if self.is_ivf:
+                faiss.GpuParameterSpace().set_index_parameter(self._gpu_index, 'nprobe', self.nprobe)
+        return self._gpu_index
+    
+    def search_batch(self, query_embeddings: np.ndarray, k: int = 10) -> List[List[Tuple[SchemeDocument, float]]]:
+        """Search many unfiltered queries in one call, on the GPU when one is available"""
+        self.flush()
+        queries = np.array(query_embeddings, dtype=np.float32).reshape(-1, self.embedding_dim)
+        faiss.normalize_L2(queries)
+        k = min(k, len(self.documents))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
         
-        # Normalize query embedding
-        query_embedding = query_embedding.astype('float32')
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
-        
-        # Search in FAISS
-        scores, indices = self.index.search(query_embedding.reshape(1, -1), 
-                                          min(k * 2, len(self.documents)))  # Get more for filtering
-        
-        # Collect results
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.documents):
-                doc = self.documents[idx]
-                
-                # Apply filters if provided
-                if filters and not self._matches_filters(doc, filters):
-                    continue
-                
-                results.append((doc, float(score)))
-                
-                if len(results) >= k:
-                    break
-        
-        logger.debug(f"Search returned {len(results)} results")
-        return results
-    
-    def _matches_filters(self, doc: SchemeDocument, filters: Dict[str, Any]) -> bool:
-        """Check if document matches the given filters"""
+        index = self._batch_search_index()
+        params = faiss.SearchParametersIVF(nprobe=self.nprobe) if self.is_ivf and index is self.index else None
+        scores, indices = index.search(queries, k, params=params)
+        
+        return [
+            [(self.documents[idx], float(score)) for idx, score in zip(row_ids, row_scores) if idx >= 0]
+            for row_ids, row_scores in zip(indices, scores)
+        ]
+    
+    def filter_only(self, filters: Dict[str, Any], k: int = 10) -> List[Tuple[SchemeDocument, float]]:
+        """First k documents matching the filters in insertion order, without a vector search
+        
+        Scores are 0.0 since no similarity is computed.
+        """
+        self.flush()
+        candidate_ids, remaining = self._candidate_ids(filters) if filters else (None, {})
+        if candidate_ids is None:
+            candidate_ids = np.arange(len(self.documents), dtype=np.int64)
+        if remaining:
+            candidate_ids = candidate_ids[self._filter_mask(candidate_ids, remaining)]
+        return [(self.documents[idx], 0.0) for idx in candidate_ids[:k]]
+    
+    def _filter_column(self, field: str) -> Tuple[np.ndarray, List[Any], List[str]]:
+        """(per-row codes, distinct values, lowercased distinct values) for a metadata field
+        
+        Code -1 marks rows without the field.
+        """
+        column = self._filter_columns.get(field)
+        if column is None:
+            # Built once per field and reused until documents change
+            interned: Dict[Any, int] = {}
+            distinct: List[Any] = []
+            
+            def intern(value: Any) -> int:
+                code = interned.setdefault(_intern_key(value), len(distinct))
+                if code == len(distinct):
+                    distinct.append(value)
+                return code
+            
+            codes = np.fromiter(
+                (intern(doc.metadata[field]) if field in doc.metadata else -1 for doc in self.documents),
+                dtype=np.int32, count=len(self.documents)
+            )
+            column = self._filter_columns[field] = (codes, distinct, [str(v).lower() for v in distinct])
+        return column
+    
+    def _compile_filters(self, filters: Dict[str, Any]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Resolve each filter to (row codes, matching codes) over the field's distinct values"""
+        predicates = []
         for key, value in filters.items():
-            if key in doc.metadata:
-                doc_value = doc.metadata[key]
-                
-                # Handle different filter types
-                if isinstance(value, list):
-                    if doc_value not in value:
-                        return False
-                elif isinstance(value, str):
-                    if value.lower() not in str(doc_value).lower():
-                        return False
-                else:
-                    if doc_value != value:
-                        return False
+            codes, distinct, lowered = self._filter_column(key)
+            
+            # Handle different filter types
+            if isinstance(value, list):
+                matched = [code for code, v in enumerate(distinct) if v in value]
+            elif isinstance(value, str):
+                value_lower = value.lower()
+                matched = [code for code, v_lower in enumerate(lowered) if value_lower in v_lower]
             else:
-                return False
-        
-        return True
+                matched = [code for code, v in enumerate(distinct) if v == value]
+            predicates.append((codes, np.array(matched, dtype=np.int32)))
+        return predicates
+    
+    def _filter_mask(self, row_ids: np.ndarray, filters: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask of the rows whose metadata matches every filter"""
+        mask = np.ones(len(row_ids), dtype=bool)
+        for codes, matched in self._compile_filters(filters):
+            mask &= np.isin(codes[row_ids], matched)
+        return mask
     
     def get_document_by_id(self, doc_id: str) -> Optional[SchemeDocument]:
         """Retrieve a document by its ID"""
         return self.id_to_doc.get(doc_id)
     
+    def remove_documents(self, doc_ids: List[str]) -> int:
+        """Remove documents by id from a flat or scalar-quantized index, returning how many were removed"""
+        self.flush()
+        if self.is_ivf or self._shards is not None:
+            raise ValueError("Documents can only be removed from flat, unsharded indexes")
+        
+        doc_ids = set(doc_ids)
+        removed = np.array([row for row, doc in enumerate(self.documents) if doc.id in doc_ids], dtype=np.int64)
+        if removed.size == 0:
+            return 0
+        
+        # Flat indexes compact on removal, so surviving rows keep their order
+        self.index.remove_ids(faiss.IDSelectorBatch(removed))
+        survivors = [doc for doc in self.documents if doc.id not in doc_ids]
+        self._reset_documents()
+        for doc in survivors:
+            self._register_document(doc)
+        
+        logger.info(f"Removed {removed.size} documents. Total: {len(self.documents)}")
+        return int(removed.size)
+    
     def get_all_metadata_values(self, field: str) -> List[Any]:
         """Get all unique values for a metadata field"""
-        values = set()
-        for doc in self.documents:
-            if field in doc.metadata:
-                values.add(doc.metadata[field])
-        return list(values)
+        return list(self._unique_by_field.get(field, ()))
     
     def save(self, filepath: str = None) -> None:
         """Save the vector store to disk"""
@@ -153,25 +620,37 @@ class VectorStore:
         filepath = Path(filepath)
         
         # Save FAISS index
-        faiss.write_index(self.index, str(filepath.with_suffix('.faiss')))
+        self.flush()
+        faiss.write_index(self._unsharded_index(), str(filepath.with_suffix('.faiss')))
         
         # Save documents (without embeddings to save space)
-        docs_data = []
-        for doc in self.documents:
-            doc_data = {
-                'id': doc.id,
-                'content': doc.content,
-                'metadata': doc.metadata
-            }
-            docs_data.append(doc_data)
-        
-        with open(filepath.with_suffix('.pkl'), 'wb') as f:
-            pickle.dump(docs_data, f)
+        # Only one document file may sit next to the index, or a later load
+        # could pair it with documents from an older save
+        if PYARROW_AVAILABLE:
+            self._write_parquet(filepath.with_suffix('.parquet'))
+            filepath.with_suffix('.pkl').unlink(missing_ok=True)
+        else:
+            docs_data = []
+            for doc in self.documents:
+                doc_data = {
+                    'id': doc.id,
+                    'content': doc.content,
+                    'metadata': doc.metadata
+                }
+                docs_data.append(doc_data)
+            
+            with open(filepath.with_suffix('.pkl'), 'wb') as f:
+                pickle.dump(docs_data, f)
+            filepath.with_suffix('.parquet').unlink(missing_ok=True)
         
         logger.info(f"Saved vector store with {len(self.documents)} documents to {filepath}")
     
-    def load(self, filepath: str = None) -> None:
-        """Load the vector store from disk"""
+    def load(self, filepath: str = None, mmap: bool = False) -> None:
+        """Load the vector store from disk
+        
+        With mmap=True an IVF index's inverted lists are memory-mapped read-only
+        and paged in on first access; documents cannot be added to it afterwards.
+        """
         if filepath is None:
             filepath = self.index_path / "vector_store"
         
@@ -179,43 +658,156 @@ class VectorStore:
         
         # Load FAISS index
         if filepath.with_suffix('.faiss').exists():
-            self.index = faiss.read_index(str(filepath.with_suffix('.faiss')))
+            io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            self.index = faiss.read_index(str(filepath.with_suffix('.faiss')), io_flags)
+            self.is_ivf = self._is_ivf()
+            self._reset_shards()
+            self._dense_i8 = None
+            self._gpu_index = None
             logger.info(f"Loaded FAISS index with {self.index.ntotal} vectors")
         
-        # Load documents
-        if filepath.with_suffix('.pkl').exists():
+        # Load documents, preferring the columnar Parquet file
+        if PYARROW_AVAILABLE and filepath.with_suffix('.parquet').exists():
+            docs_data = self._read_parquet(filepath.with_suffix('.parquet'))
+        elif filepath.with_suffix('.pkl').exists():
             with open(filepath.with_suffix('.pkl'), 'rb') as f:
                 docs_data = pickle.load(f)
-            
-            # Reconstruct documents (without embeddings)
-            self.documents = []
-            self.id_to_doc = {}
-            
-            for doc_data in docs_data:
-                doc = SchemeDocument(
-                    id=doc_data['id'],
-                    content=doc_data['content'],
-                    metadata=doc_data['metadata']
-                )
-                self.documents.append(doc)
-                self.id_to_doc[doc.id] = doc
-            
-            logger.info(f"Loaded {len(self.documents)} documents")
+        else:
+            return
+        
+        # Reconstruct documents (without embeddings)
+        self._reset_documents()
+        
+        for doc_data in docs_data:
+            doc = SchemeDocument(
+                id=doc_data['id'],
+                content=doc_data['content'],
+                metadata=doc_data['metadata']
+            )
+            self._register_document(doc)
+        
+        # Row i of the index must be document i
+        if len(self.documents) != self.index.ntotal:
+            raise ValueError(
+                f"Document file has {len(self.documents)} documents but the index has "
+                f"{self.index.ntotal} vectors; rebuild the vector store"
+            )
+        
+        logger.info(f"Loaded {len(self.documents)} documents")
+    
+    def warmup(self, n_queries: int = 16) -> None:
+        """Run throwaway searches so lazily mapped index pages are faulted in up front"""
+        if self.index.ntotal == 0:
+            return
+        
+        queries = np.random.default_rng(0).standard_normal((n_queries, self.embedding_dim))
+        for query in queries:
+            self.search_ids(query, k=10)
+        
+        logger.info(f"Warmed up vector store with {n_queries} searches")
+    
+    def _write_parquet(self, path: Path) -> None:
+        """Write documents as zstd Parquet: id, content, indexed fields, JSON for the rest"""
+        columns: Dict[str, List[Optional[str]]] = {'id': [], 'content': [], 'metadata_extra': []}
+        columns.update({field: [] for field in INDEXED_METADATA_FIELDS})
+        
+        for doc in self.documents:
+            columns['id'].append(doc.id)
+            columns['content'].append(doc.content)
+            extra = dict(doc.metadata)
+            for field in INDEXED_METADATA_FIELDS:
+                # Only string values get a typed column; anything else stays in the JSON
+                value = extra.get(field)
+                if isinstance(value, str):
+                    del extra[field]
+                else:
+                    value = None
+                columns[field].append(value)
+            columns['metadata_extra'].append(json.dumps(extra, default=_json_default))
+        
+        table = pa.table({name: pa.array(values, type=pa.string()) for name, values in columns.items()})
+        pq.write_table(table, str(path), compression='zstd')
+    
+    def _read_parquet(self, path: Path) -> List[Dict[str, Any]]:
+        """Read documents written by _write_parquet in the pickle's dict layout"""
+        table = pq.read_table(str(path), memory_map=True)
+        columns = {name: table.column(name).to_pylist() for name in table.column_names}
+        
+        docs_data = []
+        for i, (doc_id, content, extra) in enumerate(zip(columns['id'], columns['content'], columns['metadata_extra'])):
+            metadata = json.loads(extra)
+            for field in INDEXED_METADATA_FIELDS:
+                value = columns[field][i]
+                if value is not None:
+                    metadata[field] = value
+            docs_data.append({'id': doc_id, 'content': content, 'metadata': metadata})
+        return docs_data
+    
+    def quantize(self, quantization: str = "fp16") -> None:
+        """Re-encode a flat float32 index with fp16 or 8-bit scalar quantization"""
+        if quantization == "fp32":
+            return
+        if quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"Unknown quantization '{quantization}', expected fp32, fp16 or sq8")
+        self.flush()
+        if not isinstance(self.index, faiss.IndexFlat):
+            logger.warning(f"Skipping {quantization} quantization: only flat indexes can be re-encoded")
+            return
+        
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        quantized = faiss.IndexScalarQuantizer(
+            self.embedding_dim, QUANTIZATION_TYPES[quantization], faiss.METRIC_INNER_PRODUCT
+        )
+        quantized.train(vectors)
+        quantized.add(vectors)
+        self.index = quantized
+        self._dense_i8 = None
+        self._gpu_index = None
+        
+        logger.info(f"Quantized index to {quantization} ({quantized.ntotal} vectors)")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
+        self.flush()
         return {
             'total_documents': len(self.documents),
             'embedding_dimension': self.embedding_dim,
             'index_size': self.index.ntotal,
-            'unique_categories': len(self.get_all_metadata_values('category')),
-            'unique_states': len(self.get_all_metadata_values('state_name')),
-            'unique_ministries': len(self.get_all_metadata_values('implementing_ministry'))
+            'unique_categories': len(self._unique_by_field.get('category', ())),
+            'unique_states': len(self._unique_by_field.get('state_name', ())),
+            'unique_ministries': len(self._unique_by_field.get('implementing_ministry', ()))
         }
 
 class SchemeVectorStore(VectorStore):
     """Specialized vector store for government schemes"""
     
+    def _reset_documents(self) -> None:
+        super()._reset_documents()
+        # Struct-of-arrays view of the documents, one list per column, by row id
+        self._column_values: Dict[str, List[Any]] = {field: [] for field in SCHEME_COLUMNS}
+        self._content_lens: List[int] = []
+        self._column_arrays: Optional[Dict[str, np.ndarray]] = None
+        # Lowercased scheme-name tokens per row, for relevance boosting
+        self.name_tokens: List[frozenset] = []
+    
+    def _register_document(self, doc: SchemeDocument) -> None:
+        super()._register_document(doc)
+        for field, values in self._column_values.items():
+            values.append(doc.metadata.get(field, ''))
+        self._content_lens.append(len(doc.content))
+        self.name_tokens.append(frozenset(doc.metadata.get('scheme_name', '').lower().split()))
+        self._column_arrays = None
+    
+    def column(self, field: str) -> np.ndarray:
+        """Per-row array for a SCHEME_COLUMNS field or 'content_len'"""
+        if self._column_arrays is None:
+            # Rebuilt lazily so bulk inserts do not reallocate arrays per document
+            self._column_arrays = {
+                field: np.array(values, dtype=object) for field, values in self._column_values.items()
+            }
+            self._column_arrays['content_len'] = np.array(self._content_lens, dtype=np.int32)
+        return self._column_arrays[field]
+    
     def search_by_category(self, query_embedding: np.ndarray, category: str, 
                           k: int = 10) -> List[Tuple[SchemeDocument, float]]:
         """Search schemes within a specific category"""
@@ -235,7 +827,8 @@ class SchemeVectorStore(VectorStore):
         return self.search(query_embedding, k, filters)
     
     def get_schemes_by_eligibility(self, user_profile: Dict[str, Any], 
-                                  k: int = 10) -> List[Tuple[SchemeDocument, float]]:
+                                  k: int = 10,
+                                  query_embedding: Optional[np.ndarray] = None) -> List[Tuple[SchemeDocument, float]]:
         """Get schemes based on user eligibility profile"""
         # This would implement more complex eligibility matching
         # For now, we'll use basic filtering
@@ -247,6 +840,7 @@ class SchemeVectorStore(VectorStore):
         if 'category_interest' in user_profile:
             filters['category'] = user_profile['category_interest']
         
-        # Create a dummy query embedding (would be user's query embedding in practice)
-        dummy_query = np.random.random(self.embedding_dim)
-        return self.search(dummy_query, k, filters)
+        # Without a query embedding there is nothing to rank by, so skip FAISS
+        if query_embedding is None:
+            return self.filter_only(filters, k)
+        return self.search(query_embedding, k, filters)